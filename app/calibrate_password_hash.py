@@ -0,0 +1,27 @@
+"""
+Suggest PASSWORD_HASH_ROUNDS for this host.
+
+    python -m app.calibrate_password_hash --target-ms 250
+"""
+
+import argparse
+
+from app.core.config import settings
+from app.core.security import calibrate_password_rounds
+from app.core.security import PASSWORD_HASH_SCHEMES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scheme', choices=PASSWORD_HASH_SCHEMES, default=settings.PASSWORD_HASH_SCHEME)
+    parser.add_argument('--target-ms', type=float, default=250)
+    args = parser.parse_args()
+
+    rounds, elapsed = calibrate_password_rounds(args.scheme, args.target_ms / 1000)
+    print(f'PASSWORD_HASH_SCHEME={args.scheme}')
+    print(f'PASSWORD_HASH_ROUNDS={rounds}')
+    print(f'# measured {elapsed * 1000:.1f}ms per hash')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from http import HTTPStatus
 from typing import Annotated
+from typing import Any
 
 from fastapi import Depends
 from fastapi import HTTPException
@@ -7,6 +8,10 @@ from fastapi.security import OAuth2PasswordBearer
 
 from app.core import security
 from app.core.config import settings
+from app.core.db_router import set_request_user
+from app.core.user_cache import user_cache
+from app.core.user_lookup import get_user_by_email
+from app.core.user_lookup import get_user_by_id
 from app.models.user import User
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f'{settings.API_V1_STR}/login')
@@ -14,11 +19,18 @@ reusable_oauth2 = OAuth2PasswordBearer(tokenUrl=f'{settings.API_V1_STR}/login')
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
+async def get_user(user_id: Any) -> User | None:
+    if settings.USER_CACHE_ENABLED:
+        return await user_cache.get(user_id)
+    return await get_user_by_id(user_id)
+
+
 async def get_current_user(token: TokenDep) -> User:
     user_id = security.verify_token(token, 'access')
     if user_id is None:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
-    user = await User.get_or_none(id=user_id)
+    set_request_user(user_id)
+    user = await get_user(user_id)
     if user is None or user.is_active is False:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
     return user
@@ -28,7 +40,7 @@ async def get_current_user_from_email(token: str) -> User:
     email = security.verify_token(token, 'email')
     if email is None:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
-    user = await User.get_by_email(email=email)
+    user = await get_user_by_email(email)
     if user is None:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
     return user
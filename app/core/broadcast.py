@@ -0,0 +1,201 @@
+import asyncio
+import contextlib
+import logging
+import uuid
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+from typing import cast
+
+from tortoise.expressions import F
+from tortoise.expressions import Q
+
+from app.core.config import settings
+from app.core.emails import EmailData
+from app.core.emails import render_email_template
+from app.core.emails import send_email_batch
+from app.core.outbox import enqueue_emails
+from app.core.outbox import outbox_worker
+from app.models.broadcast import Broadcast
+from app.models.broadcast import BroadcastState
+from app.models.user import User
+from app.schemas.broadcast_schema import BroadcastCreate
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Broadcaster:
+    """
+    Runs broadcast email jobs in the background.
+
+    Recipients are read in id order `chunk_size` rows at a time, so memory stays flat however large the user table
+    is, and at most `concurrency` emails are in flight. Progress is saved after every chunk and a job interrupted by
+    a crash or shutdown is resumed after the last saved id, so at most one chunk is sent twice. Failed sends are
+    handed to the outbox for retry.
+
+    A job runs under a lease with a random token, renewed with every progress save. Saves only match the current
+    token, so a job whose lease expired and was taken over stops at its next save. Every `poll_interval` seconds
+    jobs with a free or expired lease are resumed, including ones whose run failed.
+    """
+
+    def __init__(self, chunk_size: int, concurrency: int, lease: float, poll_interval: float) -> None:
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self._tasks: dict[int, asyncio.Task[Broadcast]] = {}
+        self._leases: dict[int, uuid.UUID] = {}
+        self._poller: asyncio.Task[None] | None = None
+
+    async def create(self, broadcast_in: BroadcastCreate, created_by: int) -> Broadcast:
+        token = uuid.uuid4()
+        broadcast = await Broadcast.create(
+            template_name=broadcast_in.template_name,
+            subject=broadcast_in.subject,
+            context=broadcast_in.context,
+            filters=broadcast_in.filters(),
+            created_by=created_by,
+            lease_until=_now() + timedelta(seconds=self.lease),
+            lease_token=token,
+        )
+        self._spawn(broadcast.id, token)
+        return broadcast
+
+    async def _acquire(self, broadcast_id: int) -> uuid.UUID | None:
+        now = _now()
+        token = uuid.uuid4()
+        acquired = await Broadcast.filter(
+            Q(lease_until__isnull=True) | Q(lease_until__lte=now), id=broadcast_id, state=BroadcastState.RUNNING
+        ).update(lease_until=now + timedelta(seconds=self.lease), lease_token=token)
+        return token if acquired == 1 else None
+
+    async def resume(self) -> int:
+        """
+        Restart running broadcasts whose lease is free, returning how many were resumed
+        """
+        resumed = 0
+        running = await Broadcast.filter(state=BroadcastState.RUNNING).values_list('id', flat=True)
+        for broadcast_id in cast(list[int], running):
+            if broadcast_id in self._tasks:
+                continue
+            token = await self._acquire(broadcast_id)
+            if token is not None:
+                self._spawn(broadcast_id, token)
+                resumed += 1
+        return resumed
+
+    def _spawn(self, broadcast_id: int, token: uuid.UUID) -> None:
+        task = asyncio.create_task(self.run(broadcast_id, token))
+        self._tasks[broadcast_id] = task
+        self._leases[broadcast_id] = token
+
+        def done(_: asyncio.Task[Broadcast]) -> None:
+            self._tasks.pop(broadcast_id, None)
+            self._leases.pop(broadcast_id, None)
+
+        task.add_done_callback(done)
+
+    async def run(self, broadcast_id: int, token: uuid.UUID) -> Broadcast:
+        broadcast = await Broadcast.get(id=broadcast_id)
+        try:
+            while await self.run_chunk(broadcast, token):
+                pass
+        except Exception:
+            # Nothing awaits the task, the job is retried by the poll once its lease expires
+            logger.exception(f'broadcast {broadcast_id} failed after user {broadcast.last_user_id}')
+        return broadcast
+
+    async def run_chunk(self, broadcast: Broadcast, token: uuid.UUID) -> bool:
+        """
+        Deliver the next chunk of recipients and save progress under the lease `token`, returning False once the
+        broadcast is done or the lease was taken over
+        """
+        users = (
+            await User
+            .filter(id__gt=broadcast.last_user_id, **broadcast.filters)
+            .order_by('id')
+            .limit(self.chunk_size)
+            .values_list('id', 'email', 'first_name', 'last_name')
+        )
+        if not users:
+            finished_at = _now()
+            if await Broadcast.filter(id=broadcast.id, lease_token=token).update(
+                state=BroadcastState.DONE, finished_at=finished_at, lease_until=None, lease_token=None
+            ):
+                broadcast.state = BroadcastState.DONE
+                broadcast.finished_at = finished_at
+                broadcast.lease_until = None
+            else:
+                logger.warning(f'broadcast {broadcast.id} lease was taken over, stopping')
+            return False
+
+        batch = []
+        for _, email, first_name, last_name in users:
+            context = {**broadcast.context, 'name': first_name, 'first_name': first_name, 'last_name': last_name}
+            html_content = render_email_template(template_name=broadcast.template_name, context=context)
+            batch.append((email, EmailData(subject=broadcast.subject, html_content=html_content)))
+        results = await send_email_batch(batch, concurrency=self.concurrency)
+
+        failed = [item for item, delivered in zip(batch, results, strict=True) if not delivered]
+        if failed:
+            await enqueue_emails(failed)
+            outbox_worker.wake()
+
+        sent = len(batch) - len(failed)
+        saved = await Broadcast.filter(id=broadcast.id, lease_token=token).update(
+            last_user_id=users[-1][0],
+            sent=F('sent') + sent,
+            failed=F('failed') + len(failed),
+            lease_until=_now() + timedelta(seconds=self.lease),
+        )
+        if not saved:
+            # Another worker resumed the job after this chunk outlived the lease, it owns the progress from here
+            logger.warning(
+                f'broadcast {broadcast.id} lease was taken over after user {broadcast.last_user_id}, stopping'
+            )
+            return False
+        broadcast.last_user_id = users[-1][0]
+        broadcast.sent += sent
+        broadcast.failed += len(failed)
+        return True
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.resume()
+            except Exception:
+                logger.exception('broadcast resume failed')
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        # Interrupted broadcasts keep their progress and are resumed on the next start
+        if self._poller is not None:
+            self._poller.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._poller
+            self._poller = None
+        leases = dict(self._leases)
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await task
+        for broadcast_id, token in leases.items():
+            await Broadcast.filter(id=broadcast_id, lease_token=token).update(lease_until=None, lease_token=None)
+
+
+broadcaster = Broadcaster(
+    chunk_size=settings.BROADCAST_CHUNK_SIZE,
+    concurrency=settings.BROADCAST_CONCURRENCY,
+    lease=settings.BROADCAST_LEASE_SECONDS,
+    poll_interval=settings.BROADCAST_POLL_SECONDS,
+)
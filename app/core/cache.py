@@ -0,0 +1,58 @@
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+K = TypeVar('K')
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded LRU cache whose entries expire at a wall clock timestamp
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[V, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: K, value: V, expires_at: float | None = None) -> None:
+        if expires_at is None:
+            if self.ttl is None:
+                raise ValueError('expires_at is required when the cache has no default ttl')
+            expires_at = time.time() + self.ttl
+        if self.max_size <= 0 or expires_at <= time.time():
+            return
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {'size': len(self._data), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
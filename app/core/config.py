@@ -14,6 +14,14 @@ from pydantic_settings import SettingsConfigDict
 from typing_extensions import Self
 
 
+def parse_servers(v: Any) -> list[str]:
+    if isinstance(v, str):
+        return [server.strip() for server in v.split(',') if server.strip()]
+    elif isinstance(v, list):
+        return v
+    raise ValueError(v)
+
+
 def parse_cors(v: Any) -> list[str] | str:
     if isinstance(v, str) and not v.startswith('['):
         return [i.strip() for i in v.split(',')]
@@ -34,6 +42,54 @@ class Settings(BaseSettings):
     # 60 minutes
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     REFRESH_TOKEN_EXPIRE_DAYS: int = 1
+    # Revoked refresh tokens are checked against a per worker Bloom filter synced from the database
+    REVOCATION_BLOOM_CAPACITY: int = 100_000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_CACHE_SIZE: int = 1024
+    REVOCATION_SYNC_SECONDS: int = 5
+    # Buffer last_login per worker and write it in bulk, False updates it on every login
+    LAST_LOGIN_BUFFERED: bool = True
+    LAST_LOGIN_FLUSH_SECONDS: int = 10
+    LAST_LOGIN_FLUSH_SIZE: int = 1000
+    # JWT signing, EdDSA and ES256 sign with private keys from JWT_KEYS_DIR and publish their public keys at
+    # /.well-known/jwks.json, generate keys with `python -m app.generate_jwt_key`
+    JWT_ALGORITHM: Literal['HS256', 'EdDSA', 'ES256'] = 'HS256'
+    JWT_KEYS_DIR: str | None = None
+    JWT_SIGNING_KID: str | None = None
+    JWKS_MAX_AGE_SECONDS: int = 3600
+    # Password hash policy, hashes using another scheme or fewer rounds are upgraded on login.
+    # Use `python -m app.calibrate_password_hash` to pick the rounds for this host, None uses passlib defaults
+    PASSWORD_HASH_SCHEME: Literal['django_pbkdf2_sha256', 'pbkdf2_sha256', 'bcrypt'] = 'django_pbkdf2_sha256'  # noqa: S105
+    PASSWORD_HASH_ROUNDS: int | None = None
+    # Password hashing process pool, 0 workers hashes in the default thread pool
+    PASSWORD_HASH_WORKERS: int = 2
+    # Max hashing jobs waiting or running per worker before requests are rejected with 503
+    PASSWORD_HASH_QUEUE_DEPTH: int = 64
+    # Cache decoded JWTs until their exp, invalid tokens are cached for TOKEN_CACHE_NEGATIVE_TTL_SECONDS
+    TOKEN_CACHE_ENABLED: bool = False
+    TOKEN_CACHE_MAX_SIZE: int = 10_000
+    TOKEN_CACHE_NEGATIVE_TTL_SECONDS: int = 5
+    # Cache authenticated users per worker, stale entries are served while refreshed in the background
+    USER_CACHE_ENABLED: bool = False
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_STALE_SECONDS: int = 30
+    # Rate limits per client IP and per submitted email, as `<count>/<second|minute|hour|day>`
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_ALGORITHM: Literal['sliding_window', 'token_bucket'] = 'sliding_window'
+    RATE_LIMIT_SWEEP_SECONDS: int = 60
+    RATE_LIMIT_LOGIN: str = '10/minute'
+    RATE_LIMIT_REGISTER: str = '10/hour'
+    RATE_LIMIT_PASSWORD_RECOVERY: str = '5/hour'  # noqa: S105
+    RATE_LIMIT_RESEND_VERIFICATION: str = '5/hour'
+    # Bulk user import, rows are validated and written USER_IMPORT_CHUNK_SIZE at a time
+    USER_IMPORT_CHUNK_SIZE: int = 5000
+    # Failed rows listed in the import report, further failures are only counted
+    USER_IMPORT_MAX_ERRORS: int = 1000
+    # Longer import lines fail without being buffered
+    USER_IMPORT_MAX_LINE_BYTES: int = 65536
+    # Rows fetched per round trip by the user export
+    USER_EXPORT_FETCH_SIZE: int = 5000
     FRONTEND_HOST: str = 'http://localhost:5173'
     ENVIRONMENT: Literal['local', 'staging', 'production'] = 'local'
 
@@ -51,6 +107,41 @@ class Settings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASSWORD: str = ''
     POSTGRES_DB: str = ''
+    # asyncpg pool per worker process, keep workers * POSTGRES_POOL_MAX_SIZE below the server's max_connections
+    POSTGRES_POOL_MIN_SIZE: int = 1
+    POSTGRES_POOL_MAX_SIZE: int = 5
+    POSTGRES_POOL_MAX_INACTIVE_SECONDS: float = 300
+    # Prepared statements cached per connection, set to 0 behind pgbouncer in transaction mode
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    POSTGRES_COMMAND_TIMEOUT_SECONDS: float | None = None
+    # Read replicas as host or host:port, sharing the primary's database and credentials
+    POSTGRES_REPLICA_SERVERS: Annotated[list[str] | str, BeforeValidator(parse_servers)] = []
+    REPLICA_SELECTION: Literal['round_robin', 'least_loaded'] = 'round_robin'
+    # Users read from the primary for this long after a write, tracked per worker process
+    REPLICA_READ_YOUR_WRITES_SECONDS: int = 5
+    REPLICA_HEALTH_CHECK_SECONDS: float = 5
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def postgres_replicas(self) -> list[tuple[str, int]]:
+        replicas = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            if not server:
+                continue
+            host, _, port = server.partition(':')
+            replicas.append((host, int(port or self.POSTGRES_PORT)))
+        return replicas
+
+    # 'generate' creates missing tables at startup, 'check' fails unless `aerich upgrade` applied every migration.
+    # None generates for local and checks in staging and production
+    DB_SCHEMA_MODE: Literal['generate', 'check'] | None = None
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def db_schema_mode(self) -> Literal['generate', 'check']:
+        if self.DB_SCHEMA_MODE is not None:
+            return self.DB_SCHEMA_MODE
+        return 'generate' if self.ENVIRONMENT == 'local' else 'check'
 
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
@@ -58,6 +149,13 @@ class Settings(BaseSettings):
     SMTP_HOST: str | None = None
     SMTP_USER: str | None = None
     SMTP_PASSWORD: str | None = None
+    # Seconds allowed for connecting and for each SMTP command
+    SMTP_TIMEOUT: float = 10
+    # SMTP connections per worker, each reused for up to SMTP_POOL_MAX_MESSAGES messages
+    SMTP_POOL_SIZE: int = 4
+    SMTP_POOL_IDLE_SECONDS: int = 30
+    SMTP_POOL_MAX_MESSAGES: int = 100
+    SMTP_POOL_HEALTH_CHECK_SECONDS: int = 5
     # TODO: update type to EmailStr when sqlmodel supports it
     EMAILS_FROM_EMAIL: str | None = None
     EMAILS_FROM_NAME: str | None = None
@@ -69,6 +167,23 @@ class Settings(BaseSettings):
         return self
 
     EMAIL_TOKEN_EXPIRE_HOURS: int = 72
+    # Outbox delivery, failed emails are retried with exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: int = 30
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: int = 3600
+    # Sent and dead outbox rows are deleted this long after their last attempt
+    EMAIL_OUTBOX_RETENTION_HOURS: int = 168
+    # Broadcast emails, recipients are read BROADCAST_CHUNK_SIZE at a time with at most BROADCAST_CONCURRENCY in flight
+    BROADCAST_CHUNK_SIZE: int = 500
+    BROADCAST_CONCURRENCY: int = 2
+    BROADCAST_LEASE_SECONDS: int = 300
+    # Interval for resuming broadcasts whose lease expired, e.g. after a failed run or a crashed worker
+    BROADCAST_POLL_SECONDS: float = 30
+    # Directory to persist compiled email templates across restarts
+    EMAIL_TEMPLATES_BYTECODE_CACHE_DIR: str | None = None
 
     @computed_field  # type: ignore[prop-decorator]
     @property
@@ -0,0 +1,112 @@
+import os
+import time
+from collections import deque
+from typing import Any
+from typing import cast
+
+import asyncpg
+from tortoise import connections
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+
+class PoolStats:
+    """
+    Connection acquire counters for one pool, wait times are kept for the last `window` acquires
+    """
+
+    def __init__(self, window: int = 1000) -> None:
+        self.waiting = 0
+        self.acquires = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.waits: deque[float] = deque(maxlen=window)
+
+    def record(self, wait: float) -> None:
+        self.acquires += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        self.waits.append(wait)
+
+    def summary(self) -> dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def pct(value: float) -> float:
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(value / 100 * len(waits)))] * 1000, 3)
+
+        return {
+            'waiting': self.waiting,
+            'acquires': self.acquires,
+            'wait_mean_ms': round(self.wait_total / self.acquires * 1000, 3) if self.acquires else 0.0,
+            'wait_p50_ms': pct(50),
+            'wait_p95_ms': pct(95),
+            'wait_p99_ms': pct(99),
+            'wait_max_ms': round(self.wait_max * 1000, 3),
+        }
+
+
+# asyncpg is untyped and `_acquire` is private, pinned by the asyncpg version in uv.lock
+class InstrumentedPool(asyncpg.Pool):  # type: ignore[misc,no-any-unimported]
+    """
+    asyncpg pool that counts callers waiting for a connection and how long they wait
+    """
+
+    def __init__(self, *connect_args: Any, **kwargs: Any) -> None:
+        super().__init__(*connect_args, **kwargs)
+        self.stats = PoolStats()
+
+    async def _acquire(self, timeout: float | None) -> Any:
+        self.stats.waiting += 1
+        start = time.perf_counter()
+        try:
+            return await super()._acquire(timeout)
+        finally:
+            self.stats.waiting -= 1
+            self.stats.record(time.perf_counter() - start)
+
+
+class InstrumentedAsyncpgDBClient(AsyncpgDBClient):
+    async def create_pool(self, **kwargs: Any) -> InstrumentedPool:
+        # Same defaults as asyncpg.create_pool, which always builds a plain Pool
+        pool = await InstrumentedPool(None, **{**asyncpg.create_pool.__kwdefaults__, **kwargs})
+        return cast(InstrumentedPool, pool)
+
+
+# Tortoise engine entry point, use 'app.core.db' as the connection engine
+client_class = InstrumentedAsyncpgDBClient
+
+
+def pool_stats() -> dict[str, Any]:
+    """
+    Connection pool usage of this worker process for every configured connection
+    """
+    stats: dict[str, Any] = {'pid': os.getpid(), 'connections': {}}
+    for name, config in connections.db_config.items():
+        client = connections.get(name)
+        pool = getattr(client, '_pool', None)
+        if pool is None:
+            stats['connections'][name] = {'engine': config.get('engine'), 'pool': None}
+            continue
+        size = pool.get_size()
+        idle = pool.get_idle_size()
+        stats['connections'][name] = {
+            'engine': config.get('engine'),
+            'pool': {
+                'min_size': pool.get_min_size(),
+                'max_size': pool.get_max_size(),
+                'size': size,
+                'in_use': size - idle,
+                'idle': idle,
+                **(pool.stats.summary() if isinstance(pool, InstrumentedPool) else {}),
+            },
+        }
+    return stats
+
+
+async def warm_connections() -> None:
+    """
+    Open the primary's pool before serving, a pool starts with its `minsize` connections. Failing here fails startup,
+    replicas are opened by their health check instead, which marks unreachable ones unhealthy
+    """
+    await connections.get('default').execute_query('SELECT 1')
@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import itertools
+import logging
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import Any
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseTransactionWrapper
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PRIMARY = 'default'
+
+# Set for the current request once the user is known, reads for users who wrote recently stay on the primary
+_request_user: ContextVar[Any] = ContextVar('request_user', default=None)
+_use_primary: ContextVar[bool] = ContextVar('use_primary', default=False)
+
+
+def set_request_user(user_id: Any) -> None:
+    _request_user.set(user_id)
+
+
+@contextlib.contextmanager
+def use_primary() -> Iterator[None]:
+    """
+    Send every read in the block to the primary
+    """
+    token = _use_primary.set(True)
+    try:
+        yield
+    finally:
+        _use_primary.reset(token)
+
+
+def _in_transaction() -> bool:
+    return isinstance(connections.get(PRIMARY), BaseTransactionWrapper)
+
+
+class ReplicaSet:
+    """
+    Read replica connections with health tracking.
+
+    Replicas are picked round robin or by fewest busy pool connections. A replica that fails a health check is
+    skipped until it passes again, and reads fall back to the primary when none are healthy. Users who wrote within
+    `read_your_writes` seconds read from the primary so they see their own changes despite replication lag.
+    Writes are only tracked per worker process, so a request served by another worker can still read stale rows
+    from a replica, use `use_primary` for reads that must be current.
+    """
+
+    def __init__(self, aliases: list[str], selection: str, read_your_writes: float, check_interval: float) -> None:
+        self.aliases = aliases
+        self.selection = selection
+        self.check_interval = check_interval
+        self.healthy = set(aliases)
+        self.reads = dict.fromkeys(aliases, 0)
+        self.primary_reads = 0
+        self._cycle = itertools.cycle(aliases)
+        self._writers: TTLCache[Any, float] = TTLCache(max_size=100_000, ttl=read_your_writes)
+        self._task: asyncio.Task[None] | None = None
+
+    def record_write(self) -> None:
+        user_id = _request_user.get()
+        if user_id is not None:
+            self._writers.set(user_id, time.time())
+
+    def _load(self, alias: str) -> int:
+        pool = getattr(connections.get(alias), '_pool', None)
+        if pool is None:
+            return 0
+        stats = getattr(pool, 'stats', None)
+        busy: int = pool.get_size() - pool.get_idle_size()
+        return busy + (stats.waiting if stats else 0)
+
+    def choose(self) -> str | None:
+        """
+        Replica alias for the next read, None for the primary
+        """
+        if not self.healthy or _use_primary.get() or _in_transaction():
+            self.primary_reads += 1
+            return None
+        user_id = _request_user.get()
+        if user_id is not None and self._writers.get(user_id) is not None:
+            self.primary_reads += 1
+            return None
+
+        if self.selection == 'least_loaded':
+            alias = min((alias for alias in self.aliases if alias in self.healthy), key=self._load)
+        else:
+            alias = next(alias for alias in self._cycle if alias in self.healthy)
+        self.reads[alias] += 1
+        return alias
+
+    async def check(self) -> None:
+        for alias in self.aliases:
+            try:
+                await asyncio.wait_for(connections.get(alias).execute_query('SELECT 1'), timeout=self.check_interval)
+            except Exception as e:
+                if alias in self.healthy:
+                    logger.warning(f'replica {alias} unhealthy: {e!r}')
+                self.healthy.discard(alias)
+            else:
+                if alias not in self.healthy:
+                    logger.info(f'replica {alias} healthy')
+                self.healthy.add(alias)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'replicas': {
+                alias: {'healthy': alias in self.healthy, 'reads': self.reads[alias]} for alias in self.aliases
+            },
+            'primary_reads': self.primary_reads,
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+    def start(self) -> None:
+        if self.aliases and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+replicas = ReplicaSet(
+    aliases=[f'replica_{i}' for i in range(len(settings.postgres_replicas))],
+    selection=settings.REPLICA_SELECTION,
+    read_your_writes=settings.REPLICA_READ_YOUR_WRITES_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+)
+
+
+class ReplicaRouter:
+    """
+    Tortoise router sending reads to `replicas`, writes always go to the primary
+    """
+
+    def db_for_read(self, model: type) -> str | None:
+        return replicas.choose()
+
+    def db_for_write(self, model: type) -> str | None:
+        replicas.record_write()
+        return None
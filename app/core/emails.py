@@ -1,13 +1,20 @@
 import logging
 from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 from typing import Any
 
-import emails  # type: ignore
-from jinja2 import Template
+import aiosmtplib
+from jinja2 import Environment
+from jinja2 import FileSystemBytecodeCache
+from jinja2 import FileSystemLoader
+from jinja2 import select_autoescape
+from jinja2 import TemplateNotFound
 
 from app.core.config import settings
 from app.core.security import create_email_token
+from app.core.smtp_pool import smtp_pool
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -19,13 +26,64 @@ class EmailData:
     subject: str
 
 
+class EmailTemplates:
+    """
+    Compiled email templates from one shared Jinja environment.
+
+    Templates are compiled once and kept in memory, `auto_reload` recompiles them when the file changes and
+    `bytecode_cache_dir` persists compiled templates across restarts.
+    """
+
+    def __init__(self, directory: Path, auto_reload: bool = False, bytecode_cache_dir: str | None = None) -> None:
+        bytecode_cache = None
+        if bytecode_cache_dir:
+            Path(bytecode_cache_dir).mkdir(parents=True, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+        self.environment = Environment(
+            loader=FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            bytecode_cache=bytecode_cache,
+            autoescape=select_autoescape(['html']),
+            cache_size=-1,
+        )
+
+    def load(self) -> None:
+        for template_name in self.environment.list_templates(extensions=['html']):
+            self.environment.get_template(template_name)
+
+    def exists(self, template_name: str) -> bool:
+        try:
+            self.environment.get_template(template_name)
+        except TemplateNotFound:
+            return False
+        return True
+
+    def render(self, template_name: str, context: dict[str, Any]) -> str:
+        return self.environment.get_template(template_name).render(context)
+
+
+email_templates = EmailTemplates(
+    Path(__file__).resolve().parent.parent / 'email-templates' / 'build',
+    auto_reload=settings.ENVIRONMENT == 'local',
+    bytecode_cache_dir=settings.EMAIL_TEMPLATES_BYTECODE_CACHE_DIR,
+)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (Path(__file__).resolve().parent.parent / 'email-templates' / 'build' / template_name).read_text()
-    html_content = Template(template_str).render(context)
+    html_content = email_templates.render(template_name, context)
     return html_content
 
 
-def send_email(
+def build_message(*, email_to: str, subject: str = '', html_content: str = '') -> EmailMessage:
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = formataddr((settings.EMAILS_FROM_NAME or '', settings.EMAILS_FROM_EMAIL or ''))
+    message['To'] = email_to
+    message.set_content(html_content, subtype='html')
+    return message
+
+
+async def send_email(
     *,
     email_to: str,
     subject: str = '',
@@ -33,25 +91,36 @@ def send_email(
 ) -> None:
     if not settings.emails_enabled:
         logger.error('no provided configuration for email variables')
-
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
-    )
-    smtp_options = {'host': settings.SMTP_HOST, 'port': settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options['tls'] = True
-    elif settings.SMTP_SSL:
-        smtp_options['ssl'] = True
-    if settings.SMTP_USER:
-        smtp_options['user'] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options['password'] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
+        return
+
+    message = build_message(email_to=email_to, subject=subject, html_content=html_content)
+    try:
+        response = await smtp_pool.send(message)
+    except (aiosmtplib.SMTPException, OSError):
+        logger.exception('send email failed')
+        return
     logger.info(f'send email result: {response}')
 
 
+async def send_email_batch(batch: list[tuple[str, EmailData]], concurrency: int | None = None) -> list[bool]:
+    """
+    Send (email_to, EmailData) pairs over the pooled SMTP connections, returning whether each one was delivered
+    """
+    if not settings.emails_enabled:
+        logger.error('no provided configuration for email variables')
+        return [False] * len(batch)
+
+    messages = [
+        build_message(email_to=email_to, subject=data.subject, html_content=data.html_content)
+        for email_to, data in batch
+    ]
+    results = await smtp_pool.send_many(messages, concurrency=concurrency)
+    for (email_to, _), result in zip(batch, results, strict=True):
+        if isinstance(result, BaseException):
+            logger.error(f'send email to {email_to} failed: {result!r}')
+    return [not isinstance(result, BaseException) for result in results]
+
+
 def generate_verification_email(email_to: str, first_name: str) -> EmailData:
     token = create_email_token(email_to)
     link = f'{settings.FRONTEND_HOST}/verify-email/{token}/confirm'
@@ -112,7 +181,7 @@ def generate_reset_password_email(email_to: str, first_name: str) -> EmailData:
 
     subject = 'Password Reset'
     html_content = render_email_template(
-        template_name='remove_account.html',
+        template_name='password_reset.html',
         context={
             'name': first_name,
             'reset_password_url': link,
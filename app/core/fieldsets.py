@@ -0,0 +1,28 @@
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Query
+from pydantic import BaseModel
+
+
+def sparse_fields(model: type[BaseModel]) -> Any:
+    """
+    Dependency resolving the `fields` query parameter, a comma separated subset of `model`'s fields, to the field
+    names to return. All of `model`'s fields when it is not set.
+    """
+    allowed = tuple(model.model_fields)
+
+    def dependency(
+        fields: str | None = Query(None, description=f'Comma separated subset of {", ".join(allowed)}'),
+    ) -> tuple[str, ...]:
+        requested = tuple(dict.fromkeys(name.strip() for name in (fields or '').split(',') if name.strip()))
+        if not requested:
+            return allowed
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=f'Unknown fields: {", ".join(unknown)}')
+        return requested
+
+    return Depends(dependency)
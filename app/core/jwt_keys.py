@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import Any
+
+import jwt
+
+from app.core.config import settings
+
+
+@dataclass
+class JWTKeys:
+    algorithm: str
+    signing_key: Any
+    # kid of the signing key, None for HS256 where SECRET_KEY signs and verifies everything
+    kid: str | None = None
+    verification_keys: dict[str, Any] = field(default_factory=dict)
+    jwks: dict[str, Any] = field(default_factory=lambda: {'keys': []})
+
+    def headers(self) -> dict[str, str] | None:
+        return {'kid': self.kid} if self.kid else None
+
+    def verification_key(self, token: str) -> Any:
+        if self.kid is None:
+            return self.signing_key
+        kid = jwt.get_unverified_header(token).get('kid')
+        if kid not in self.verification_keys:
+            raise jwt.InvalidKeyError(f'unknown kid {kid}')
+        return self.verification_keys[kid]
+
+
+def load_jwt_keys() -> JWTKeys:
+    """
+    Parse the signing keys, for asymmetric algorithms every `<kid>.pem` private key in JWT_KEYS_DIR verifies tokens
+    and JWT_SIGNING_KID (or the last kid) signs them
+    """
+    if settings.JWT_ALGORITHM == 'HS256':
+        return JWTKeys(algorithm='HS256', signing_key=settings.SECRET_KEY)
+
+    # Requires pyjwt[crypto]
+    from cryptography.hazmat.primitives.serialization import load_pem_private_key
+
+    if not settings.JWT_KEYS_DIR:
+        raise ValueError(f'JWT_KEYS_DIR is required for {settings.JWT_ALGORITHM}')
+    private_keys = {
+        path.stem: load_pem_private_key(path.read_bytes(), password=None)
+        for path in sorted(Path(settings.JWT_KEYS_DIR).glob('*.pem'))
+    }
+    if not private_keys:
+        raise ValueError(f'no .pem keys found in {settings.JWT_KEYS_DIR}')
+    kid = settings.JWT_SIGNING_KID or max(private_keys)
+    if kid not in private_keys:
+        raise ValueError(f'JWT_SIGNING_KID {kid} not found in {settings.JWT_KEYS_DIR}')
+
+    algorithm = jwt.get_algorithm_by_name(settings.JWT_ALGORITHM)
+    verification_keys = {key_id: key.public_key() for key_id, key in private_keys.items()}
+    jwks = {
+        'keys': [
+            {**algorithm.to_jwk(key, as_dict=True), 'kid': key_id, 'use': 'sig', 'alg': settings.JWT_ALGORITHM}
+            for key_id, key in verification_keys.items()
+        ]
+    }
+    return JWTKeys(
+        algorithm=settings.JWT_ALGORITHM,
+        signing_key=private_keys[kid],
+        kid=kid,
+        verification_keys=verification_keys,
+        jwks=jwks,
+    )
+
+
+_jwt_keys: JWTKeys | None = None
+
+
+def init_jwt_keys() -> None:
+    global _jwt_keys
+    _jwt_keys = load_jwt_keys()
+
+
+def get_jwt_keys() -> JWTKeys:
+    if _jwt_keys is None:
+        init_jwt_keys()
+    return _jwt_keys  # type: ignore[return-value]
@@ -0,0 +1,98 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+from typing import Any
+
+from tortoise.transactions import in_transaction
+
+from app.core.config import settings
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """
+    Write-behind buffer for `User.last_login`.
+
+    Logins are coalesced per user id and written with one bulk UPDATE every `interval` seconds, once `max_size` users
+    are pending, and on shutdown.
+    """
+
+    def __init__(self, max_size: int, interval: float) -> None:
+        self.max_size = max_size
+        self.interval = interval
+        self.flushed = 0
+        self._pending: dict[Any, datetime] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def record(self, user_id: Any, last_login: datetime) -> None:
+        if not settings.LAST_LOGIN_BUFFERED:
+            await User.filter(id=user_id).update(last_login=last_login)
+            return
+        self._pending[user_id] = last_login
+        if len(self._pending) >= self.max_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            await self._write(pending)
+        except BaseException:
+            # Keep the values for the next flush unless a newer login replaced them, also when cancelled mid write
+            self._pending = pending | self._pending
+            raise
+        self.flushed += len(pending)
+
+    async def _write(self, pending: dict[Any, datetime]) -> None:
+        db = User._meta.db
+        field = User._meta.fields_map['last_login']
+        if db.capabilities.dialect != 'postgres':
+            async with in_transaction(db.connection_name):
+                for user_id, last_login in pending.items():
+                    await User.filter(id=user_id).update(last_login=last_login)
+            return
+
+        rows = []
+        values: list[Any] = []
+        for user_id, last_login in pending.items():
+            rows.append(f'(${len(values) + 1}::bigint, ${len(values) + 2}::timestamptz)')
+            values += [user_id, field.to_db_value(last_login, User)]
+        await db.execute_query(
+            'UPDATE "user" AS u SET "last_login" = v.last_login '  # noqa: S608
+            f'FROM (VALUES {", ".join(rows)}) AS v(id, last_login) WHERE u.id = v.id',
+            values,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('failed to flush last_login updates')
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            # A flush interrupted by the cancel has put its batch back by the time the task finishes
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+
+last_login_buffer = LastLoginBuffer(
+    max_size=settings.LAST_LOGIN_FLUSH_SIZE,
+    interval=settings.LAST_LOGIN_FLUSH_SECONDS,
+)
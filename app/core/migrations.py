@@ -0,0 +1,48 @@
+import logging
+import re
+from pathlib import Path
+
+from aerich.models import Aerich
+from tortoise.exceptions import OperationalError
+
+from app.core.db_router import use_primary
+
+logger = logging.getLogger(__name__)
+
+# Same directory as [tool.aerich] location in pyproject.toml, one subdirectory per Tortoise app
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / 'migrations' / 'app'
+MIGRATION_FILE = re.compile(r'^\d+_.+\.py$')
+
+
+class MigrationsPending(RuntimeError):
+    pass
+
+
+def migration_files(directory: Path = MIGRATIONS_DIR) -> list[str]:
+    """
+    Migration file names in the order aerich applies them
+    """
+    names = [path.name for path in directory.iterdir() if MIGRATION_FILE.match(path.name)]
+    return sorted(names, key=lambda name: int(name.split('_', 1)[0]))
+
+
+async def check_migrations(app: str = 'app', directory: Path = MIGRATIONS_DIR) -> None:
+    """
+    Raise `MigrationsPending` unless every migration in `directory` was applied by `aerich upgrade`.
+    Only reads the aerich table, so every worker can run it at startup instead of generating the schema.
+    """
+    try:
+        # A replica may lag behind the migrations
+        with use_primary():
+            applied = set(await Aerich.filter(app=app).values_list('version', flat=True))
+    except OperationalError as e:
+        raise MigrationsPending(f'Migration history for {app!r} is unreadable, run `aerich upgrade`: {e}') from e
+
+    files = migration_files(directory)
+    pending = [name for name in files if name not in applied]
+    if pending:
+        raise MigrationsPending(f'{len(pending)} migrations not applied to {app!r}, run `aerich upgrade`: {pending}')
+    unknown = applied.difference(files)
+    if unknown:
+        # The database is ahead of this build, usually during a rolling deploy
+        logger.warning('database has migrations unknown to this build: %s', sorted(unknown))
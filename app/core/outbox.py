@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
+
+from tortoise.expressions import F
+from tortoise.functions import Count
+from tortoise.transactions import in_transaction
+
+from app.core.config import settings
+from app.core.emails import build_message
+from app.core.emails import EmailData
+from app.core.smtp_pool import smtp_pool
+from app.models.outbox import Outbox
+from app.models.outbox import OutboxState
+
+logger = logging.getLogger(__name__)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def enqueue_email(email_to: str, email_data: EmailData) -> Outbox:
+    """
+    Queue an email for delivery, call inside the transaction that makes the change the email is about
+    """
+    return await Outbox.create(
+        email_to=email_to,
+        subject=email_data.subject,
+        html_content=email_data.html_content,
+        available_at=_now(),
+    )
+
+
+async def enqueue_emails(batch: list[tuple[str, EmailData]]) -> None:
+    """
+    Queue several emails with one insert
+    """
+    now = _now()
+    await Outbox.bulk_create([
+        Outbox(email_to=email_to, subject=data.subject, html_content=data.html_content, available_at=now)
+        for email_to, data in batch
+    ])
+
+
+async def outbox_counts() -> dict[str, int]:
+    counts = {state.value: 0 for state in OutboxState}
+    rows = await Outbox.annotate(count=Count('id')).group_by('state').values('state', 'count')
+    for row in rows:
+        counts[OutboxState(row['state']).value] = row['count']
+    return counts
+
+
+class OutboxWorker:
+    """
+    Delivers outbox emails.
+
+    Batches are claimed with SELECT ... FOR UPDATE SKIP LOCKED and leased by moving `available_at` forward, so any
+    number of workers can drain the outbox and a crashed worker's batch is retried once its lease expires.
+    Failed deliveries are retried with exponential backoff and marked dead after `max_attempts`.
+    Sent and dead rows are purged `retention` seconds after their last attempt, checked every `purge_interval`.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_interval: float,
+        lease: float,
+        max_attempts: int,
+        backoff: float,
+        max_backoff: float,
+        retention: float,
+        purge_interval: float = 3600,
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+
+    def wake(self) -> None:
+        self._wakeup.set()
+
+    async def claim(self) -> list[Outbox]:
+        now = _now()
+        async with in_transaction('default'):
+            rows = (
+                await Outbox
+                .filter(state=OutboxState.PENDING, available_at__lte=now)
+                .order_by('available_at')
+                .limit(self.batch_size)
+                .select_for_update(skip_locked=True)
+            )
+            if rows:
+                await Outbox.filter(id__in=[row.id for row in rows]).update(
+                    available_at=now + timedelta(seconds=self.lease), attempts=F('attempts') + 1
+                )
+        for row in rows:
+            row.attempts += 1
+        return rows
+
+    async def deliver(self, rows: list[Outbox]) -> None:
+        messages = [
+            build_message(email_to=row.email_to, subject=row.subject, html_content=row.html_content) for row in rows
+        ]
+        results = await smtp_pool.send_many(messages)
+        now = _now()
+
+        sent = [row.id for row, result in zip(rows, results, strict=True) if not isinstance(result, BaseException)]
+        if sent:
+            await Outbox.filter(id__in=sent).update(
+                state=OutboxState.SENT, sent_at=now, last_error=None, html_content=None
+            )
+        for row, result in zip(rows, results, strict=True):
+            if not isinstance(result, BaseException):
+                continue
+            logger.error(f'outbox email {row.id} attempt {row.attempts} failed: {result!r}')
+            if row.attempts >= self.max_attempts:
+                await Outbox.filter(id=row.id).update(state=OutboxState.DEAD, last_error=repr(result))
+            else:
+                delay = min(self.max_backoff, self.backoff * 2 ** (row.attempts - 1))
+                await Outbox.filter(id=row.id).update(
+                    available_at=now + timedelta(seconds=delay), last_error=repr(result)
+                )
+
+    async def purge(self) -> int:
+        """
+        Delete sent and dead rows, `available_at` of a finished row is the lease of its last attempt
+        """
+        cutoff = _now() - timedelta(seconds=self.retention)
+        return await Outbox.filter(state__in=[OutboxState.SENT, OutboxState.DEAD], available_at__lt=cutoff).delete()
+
+    async def run_once(self) -> int:
+        rows = await self.claim()
+        if rows:
+            await self.deliver(rows)
+        return len(rows)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= self._next_purge:
+                self._next_purge = loop.time() + self.purge_interval
+                try:
+                    purged = await self.purge()
+                    if purged:
+                        logger.info(f'outbox purged {purged} finished emails')
+                except Exception:
+                    logger.exception('outbox purge failed')
+            try:
+                delivered = await self.run_once()
+            except Exception:
+                logger.exception('outbox delivery failed')
+                delivered = 0
+            if delivered < self.batch_size:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # Claimed but undelivered rows are retried when their lease expires
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+outbox_worker = OutboxWorker(
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    lease=settings.EMAIL_OUTBOX_LEASE_SECONDS,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+    max_backoff=settings.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+    retention=settings.EMAIL_OUTBOX_RETENTION_HOURS * 3600,
+)
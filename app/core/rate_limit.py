@@ -0,0 +1,160 @@
+import math
+import time
+from collections import Counter
+from http import HTTPStatus
+from typing import Any
+from typing import NamedTuple
+from typing import Protocol
+
+from fastapi import Depends
+from fastapi import HTTPException
+from fastapi import Request
+
+from app.core.config import settings
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+class Rate(NamedTuple):
+    limit: int
+    period: float
+
+    @classmethod
+    def parse(cls, value: str) -> 'Rate':
+        """
+        Parse a rate such as `5/minute`
+        """
+        limit, period = value.split('/')
+        if int(limit) < 1:
+            raise ValueError(f'rate limit must allow at least one request: {value}')
+        return cls(int(limit), PERIODS[period.strip()])
+
+
+class RateLimitBackend(Protocol):
+    """
+    Stores rate limit state, `hit` returns 0 when allowed or the seconds to wait before retrying
+    """
+
+    def hit(self, key: str, rate: Rate) -> float: ...
+
+    def __len__(self) -> int: ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per worker rate limit state with constant memory per key.
+
+    `sliding_window` weights the previous fixed window's count by its overlap with the sliding window,
+    `token_bucket` refills `limit` tokens per `period`.
+    Idle keys are evicted every `sweep_interval` seconds.
+    """
+
+    def __init__(self, algorithm: str = 'sliding_window', sweep_interval: float = 60) -> None:
+        if algorithm not in ('sliding_window', 'token_bucket'):
+            raise ValueError(f'unknown rate limit algorithm {algorithm}')
+        self.algorithm = algorithm
+        self.sweep_interval = sweep_interval
+        # key -> (expires, window start, current count, previous count) or (expires, last refill, tokens, 0)
+        self._state: dict[str, tuple[float, float, float, float]] = {}
+        self._last_sweep = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._state)
+
+    def hit(self, key: str, rate: Rate) -> float:
+        now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+        if self.algorithm == 'token_bucket':
+            return self._token_bucket(key, rate, now)
+        return self._sliding_window(key, rate, now)
+
+    def sweep(self, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self._state = {key: state for key, state in self._state.items() if state[0] > now}
+        self._last_sweep = now
+
+    def _sliding_window(self, key: str, rate: Rate, now: float) -> float:
+        limit, period = rate
+        _, start, current, previous = self._state.get(key, (0, now, 0, 0))
+        windows = int((now - start) // period)
+        if windows:
+            previous = current if windows == 1 else 0
+            current = 0
+            start += windows * period
+        elapsed = now - start
+        if previous * (1 - elapsed / period) + current + 1 > limit:
+            if current + 1 > limit:
+                # Wait for the next window, where this window's count becomes the weighted previous count
+                return period - elapsed + max(0.0, period * (1 - (limit - 1) / current))
+            return max(0.0, period * (1 - (limit - current - 1) / previous) - elapsed)
+        self._state[key] = (start + 2 * period, start, current + 1, previous)
+        return 0
+
+    def _token_bucket(self, key: str, rate: Rate, now: float) -> float:
+        limit, period = rate
+        refill = limit / period
+        _, last, tokens, _ = self._state.get(key, (0, now, limit, 0))
+        tokens = min(limit, tokens + (now - last) * refill)
+        if tokens < 1:
+            self._state[key] = (now + period, now, tokens, 0)
+            return (1 - tokens) / refill
+        self._state[key] = (now + period, now, tokens - 1, 0)
+        return 0
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend) -> None:
+        self.backend = backend
+        self.rejected: Counter[str] = Counter()
+
+    def check(self, scope: str, rate: Rate, keys: list[str]) -> None:
+        for key in keys:
+            retry_after = self.backend.hit(f'{scope}:{key}', rate)
+            if retry_after > 0:
+                self.rejected[scope] += 1
+                raise HTTPException(
+                    status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                    detail=HTTPStatus.TOO_MANY_REQUESTS.phrase,
+                    headers={'Retry-After': str(math.ceil(retry_after))},
+                )
+
+    def stats(self) -> dict[str, Any]:
+        return {'keys': len(self.backend), 'rejected': dict(self.rejected)}
+
+
+limiter = RateLimiter(
+    InMemoryRateLimitBackend(settings.RATE_LIMIT_ALGORITHM, sweep_interval=settings.RATE_LIMIT_SWEEP_SECONDS)
+)
+
+
+async def _submitted_email(request: Request) -> str | None:
+    content_type = request.headers.get('content-type', '')
+    try:
+        if content_type.startswith('application/json'):
+            body = await request.json()
+            email = body.get('email') if isinstance(body, dict) else None
+        elif content_type.startswith(('application/x-www-form-urlencoded', 'multipart/form-data')):
+            email = (await request.form()).get('username')
+        else:
+            email = None
+    except ValueError:
+        return None
+    return email.lower() if isinstance(email, str) else None
+
+
+def rate_limit(scope: str, setting: str) -> Any:
+    """
+    Dependency limiting requests per client IP and per submitted email to the `setting` rate, e.g. `5/minute`
+    """
+
+    async def dependency(request: Request) -> None:
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        keys = [f'ip:{request.client.host if request.client else "unknown"}']
+        email = await _submitted_email(request)
+        if email:
+            keys.append(f'email:{email}')
+        limiter.check(scope, Rate.parse(getattr(settings, setting)), keys)
+
+    return Depends(dependency)
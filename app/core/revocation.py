@@ -0,0 +1,127 @@
+import hashlib
+import math
+import time
+from datetime import datetime
+from datetime import timezone
+
+from tortoise.exceptions import IntegrityError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.db_router import use_primary
+from app.models.token import RevokedToken
+
+# Only refresh token families are looked up, used `jti:` keys are enforced by the unique key on insert
+CHECKED_PREFIX = 'family:'
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray(math.ceil(self.size / 8))
+
+    def _positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationStore:
+    """
+    Revoked refresh tokens, stored in the revoked_token table.
+
+    A per worker Bloom filter holds every unexpired `family:` revocation, so a family that was never revoked is
+    answered without a query. Bloom filter hits are confirmed against a small set of known revocations, then the database.
+    Revocations from other workers are loaded every REVOCATION_SYNC_SECONDS. Every read goes to the primary, a
+    lagging replica would accept a token that was just revoked.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, cache_size: int, sync_interval: float) -> None:
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.revoked: TTLCache[str, bool] = TTLCache(max_size=cache_size)
+        self.database_checks = 0
+        self._last_id = 0
+        self._last_sync = -math.inf
+
+    async def sync(self) -> None:
+        with use_primary():
+            await self._sync()
+
+    async def _sync(self) -> None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        checked = RevokedToken.filter(key__startswith=CHECKED_PREFIX, expires__gt=now)
+        if self.bloom.count >= self.bloom.capacity:
+            # Rebuild once full to keep the false positive rate, dropping expired revocations. The new filter is at
+            # least twice the live revocations, so it isn't full again until as many new ones arrive
+            await RevokedToken.filter(expires__lte=now).delete()
+            live = await checked.count()
+            self.bloom = BloomFilter(max(self.capacity, 2 * live), self.error_rate)
+            self._last_id = 0
+        rows = await checked.filter(id__gt=self._last_id).order_by('id').values_list('id', 'key')
+        for row_id, key in rows:
+            if key not in self.bloom:
+                self.bloom.add(key)
+            self._last_id = max(self._last_id, row_id)
+        self._last_sync = time.monotonic()
+
+    def _remember(self, key: str, expires: datetime) -> None:
+        if not key.startswith(CHECKED_PREFIX):
+            return
+        if key not in self.bloom:
+            self.bloom.add(key)
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        self.revoked.set(key, True, expires_at=expires.timestamp())
+
+    async def is_revoked(self, key: str) -> bool:
+        if not key.startswith(CHECKED_PREFIX):
+            # Not in the filter
+            with use_primary():
+                return await RevokedToken.exists(key=key)
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            await self.sync()
+        if key not in self.bloom:
+            return False
+        if self.revoked.get(key):
+            return True
+        self.database_checks += 1
+        with use_primary():
+            revocation = await RevokedToken.get_or_none(key=key)
+        if revocation is None:
+            return False
+        self._remember(key, revocation.expires)
+        return True
+
+    async def revoke(self, key: str, expires: datetime) -> bool:
+        """
+        Revoke a key, returns False when it was already revoked
+        """
+        try:
+            await RevokedToken.create(key=key, expires=expires)
+        except IntegrityError:
+            self._remember(key, expires)
+            return False
+        self._remember(key, expires)
+        return True
+
+
+revocations = RevocationStore(
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    cache_size=settings.REVOCATION_CACHE_SIZE,
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+)
@@ -1,21 +1,154 @@
+import asyncio
+import hashlib
+import math
+import multiprocessing
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
+from typing import Any
+from typing import TypeVar
+from typing import cast
 
 import jwt
-from passlib.hash import django_pbkdf2_sha256 as handler
+from passlib.context import CryptContext
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.jwt_keys import get_jwt_keys
 
-ALGORITHM = 'HS256'
+PASSWORD_HASH_SCHEMES = ['django_pbkdf2_sha256', 'pbkdf2_sha256', 'bcrypt']
 
+T = TypeVar('T')
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return handler.verify(plain_password, hashed_password)
+# Decoded (subject, token type) keyed by token digest, used when TOKEN_CACHE_ENABLED
+token_cache: TTLCache[bytes, tuple[Any, Any]] = TTLCache(max_size=settings.TOKEN_CACHE_MAX_SIZE)
 
+_password_executor: Executor | None = None
+_password_jobs = 0
 
-def get_password_hash(password: str) -> str:
-    return handler.hash(password)
+
+class PasswordHasherBusy(Exception):
+    """Raised when more password hashing jobs are queued than PASSWORD_HASH_QUEUE_DEPTH allows."""
+
+
+def build_password_context(scheme: str, rounds: int | None = None) -> CryptContext:
+    """
+    Hash with `scheme` at `rounds`, other schemes and cheaper hashes are flagged for rehashing
+    """
+    policy: dict[str, Any] = {}
+    if rounds is not None:
+        policy[f'{scheme}__rounds'] = rounds
+        policy[f'{scheme}__min_rounds'] = rounds
+    return CryptContext(schemes=PASSWORD_HASH_SCHEMES, default=scheme, deprecated='auto', **policy)
+
+
+pwd_context = build_password_context(settings.PASSWORD_HASH_SCHEME, settings.PASSWORD_HASH_ROUNDS)
+
+
+def calibrate_password_rounds(scheme: str, target_seconds: float, samples: int = 3) -> tuple[int, float]:
+    """
+    Suggest the rounds for `scheme` whose hash time on this host is closest to `target_seconds`.
+    Returns the suggested rounds and the measured seconds per hash at those rounds.
+    """
+    hasher = pwd_context.handler(scheme)
+
+    def measure(rounds: int) -> float:
+        custom = hasher.using(rounds=rounds)
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            custom.hash('calibration')
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    rounds = hasher.default_rounds
+    elapsed = measure(rounds)
+    if hasher.rounds_cost == 'log2':
+        rounds += round(math.log2(target_seconds / elapsed))
+    else:
+        rounds = round(rounds * target_seconds / elapsed)
+    rounds = max(hasher.min_rounds, min(hasher.max_rounds, rounds))
+    return rounds, measure(rounds)
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def _hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def start_password_executor() -> None:
+    """
+    Start the process pool used for password hashing
+    """
+    global _password_executor
+    if _password_executor is None and settings.PASSWORD_HASH_WORKERS > 0:
+        _password_executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+
+
+def shutdown_password_executor() -> None:
+    """
+    Stop the password hashing process pool, cancelling queued jobs
+    """
+    global _password_executor
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=True, cancel_futures=True)
+        _password_executor = None
+
+
+async def _run_password_job(func: Callable[..., T], *args: Any) -> T:
+    # Without a running pool (tests, PASSWORD_HASH_WORKERS=0) fall back to the default thread pool,
+    # which still keeps the event loop free since hashlib's pbkdf2 releases the GIL.
+    global _password_jobs
+    if _password_jobs >= settings.PASSWORD_HASH_QUEUE_DEPTH:
+        raise PasswordHasherBusy
+    _password_jobs += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_jobs -= 1
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(_verify_password, plain_password, hashed_password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify a password, returning a new hash when the stored one does not match the current policy
+    """
+    return await _run_password_job(_verify_and_update_password, plain_password, hashed_password)
+
+
+async def hash_password(password: str) -> str:
+    return await _run_password_job(_hash_password, password)
+
+
+async def run_password_job(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run other CPU bound work on the password hashing workers, `func` must be importable by the worker processes
+    """
+    return await _run_password_job(func, *args)
+
+
+def _encode_token(payload: dict[str, Any]) -> str:
+    keys = get_jwt_keys()
+    encoded_jwt: str = jwt.encode(payload, keys.signing_key, algorithm=keys.algorithm, headers=keys.headers())
+    return encoded_jwt
 
 
 def create_access_token(user_id: int, expires_delta: timedelta | None = None) -> str:
@@ -30,15 +163,22 @@ def create_access_token(user_id: int, expires_delta: timedelta | None = None) ->
         'user_id': user_id,
         'token_type': 'access',
     }
-    encoded_jwt: str = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    return _encode_token(to_encode)
 
 
-def create_refresh_token(user_id: int) -> str:
-    expire = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {'exp': expire, 'user_id': user_id, 'token_type': 'refresh'}
-    encoded_jwt: str = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+def create_refresh_token(user_id: int, family: str | None = None) -> str:
+    """
+    Create a refresh token with a unique jti, in a new token family unless rotating an existing one
+    """
+    expire = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {
+        'exp': expire,
+        'user_id': user_id,
+        'token_type': 'refresh',
+        'jti': uuid.uuid4().hex,
+        'family': family or uuid.uuid4().hex,
+    }
+    return _encode_token(to_encode)
 
 
 def create_email_token(email: str) -> str:
@@ -46,25 +186,50 @@ def create_email_token(email: str) -> str:
     now = datetime.now(timezone.utc)
     expires = now + delta
     exp = expires.timestamp()
-    encoded_jwt = jwt.encode(
-        {'exp': exp, 'nbf': now, 'user_id': email, 'token_type': 'email'},
-        settings.SECRET_KEY,
-        algorithm=ALGORITHM,
-    )
-    return encoded_jwt
+    return _encode_token({'exp': exp, 'nbf': now, 'user_id': email, 'token_type': 'email'})
+
+
+def _decode_token(token: str) -> tuple[Any, Any, float]:
+    """
+    Decode a JWT token into its subject, type and expiry, invalid tokens decode to a short lived empty entry
+    """
+    keys = get_jwt_keys()
+    try:
+        payload = jwt.decode(token, keys.verification_key(token), algorithms=[keys.algorithm])
+        return payload['user_id'], payload['token_type'], float(payload.get('exp', 0))
+    except Exception:
+        return None, None, time.time() + settings.TOKEN_CACHE_NEGATIVE_TTL_SECONDS
+
+
+def decode_token(token: str, type: str) -> dict[str, Any] | None:
+    """
+    Verify a JWT token and return all of its claims if valid
+    """
+    keys = get_jwt_keys()
+    try:
+        payload: dict[str, Any] = jwt.decode(token, keys.verification_key(token), algorithms=[keys.algorithm])
+    except Exception:
+        return None
+    if payload.get('user_id') is None or payload.get('token_type') != type:
+        return None
+    return payload
 
 
 def verify_token(token: str, type: str) -> str | None:
     """
     Verify a JWT token and return TokenData if valid
     """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload['user_id']
-        if sub is None or payload['token_type'] != type:
-            return None
+    if settings.TOKEN_CACHE_ENABLED:
+        key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+        entry = token_cache.get(key)
+        if entry is None:
+            sub, token_type, expires_at = _decode_token(token)
+            token_cache.set(key, (sub, token_type), expires_at=expires_at)
         else:
-            return sub
+            sub, token_type = entry
+    else:
+        sub, token_type, _ = _decode_token(token)
 
-    except Exception:
+    if sub is None or token_type != type:
         return None
+    return cast(str, sub)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from email.message import EmailMessage
+from typing import Any
+
+import aiosmtplib
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    __slots__ = ('client', 'last_used', 'messages')
+
+    def __init__(self, client: aiosmtplib.SMTP) -> None:
+        self.client = client
+        self.last_used = time.monotonic()
+        self.messages = 0
+
+
+class SMTPConnectionPool:
+    """
+    Bounded pool of authenticated SMTP connections.
+
+    At most `max_size` connections are open at once. Idle connections are closed after `idle_timeout` seconds,
+    checked with NOOP when idle for more than `health_check_after` seconds and recycled after `max_messages`
+    messages, so a `max_messages` of 1 opens a connection per message.
+    """
+
+    def __init__(self, max_size: int, idle_timeout: float, max_messages: int, health_check_after: float) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.health_check_after = health_check_after
+        self.connects = 0
+        self._idle: deque[PooledConnection] = deque()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._semaphore is None:
+            # Connections can not be shared across event loops
+            self._idle.clear()
+            self._semaphore = asyncio.Semaphore(max(1, self.max_size))
+            self._loop = loop
+        return self._semaphore
+
+    async def _connect(self) -> PooledConnection:
+        client = aiosmtplib.SMTP(
+            hostname=settings.SMTP_HOST,
+            port=settings.SMTP_PORT,
+            username=settings.SMTP_USER or None,
+            password=settings.SMTP_PASSWORD or None,
+            start_tls=settings.SMTP_TLS,
+            use_tls=settings.SMTP_SSL and not settings.SMTP_TLS,
+            timeout=settings.SMTP_TIMEOUT,
+        )
+        await client.connect()
+        self.connects += 1
+        return PooledConnection(client)
+
+    async def _discard(self, connection: PooledConnection) -> None:
+        try:
+            await connection.client.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            connection.client.close()
+
+    async def _checkout(self) -> PooledConnection:
+        while self._idle:
+            connection = self._idle.pop()
+            idle = time.monotonic() - connection.last_used
+            if not connection.client.is_connected or idle >= self.idle_timeout:
+                await self._discard(connection)
+                continue
+            if idle >= self.health_check_after:
+                try:
+                    await connection.client.noop()
+                except (aiosmtplib.SMTPException, OSError):
+                    connection.client.close()
+                    continue
+            return connection
+        return await self._connect()
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[PooledConnection]:
+        async with self._bind_loop():
+            connection = await self._checkout()
+            try:
+                yield connection
+            except BaseException:
+                connection.client.close()
+                raise
+            connection.last_used = time.monotonic()
+            if connection.messages < self.max_messages:
+                self._idle.append(connection)
+            else:
+                await self._discard(connection)
+
+    async def send(self, message: EmailMessage) -> Any:
+        async with self.connection() as connection:
+            response = await connection.client.send_message(message)
+            connection.messages += 1
+            return response
+
+    async def send_many(self, messages: list[EmailMessage], concurrency: int | None = None) -> list[Any]:
+        """
+        Send messages over at most `max_size` reused connections, or `concurrency` if lower, returning each
+        response or exception
+        """
+        if concurrency is None or concurrency >= self.max_size:
+            return await asyncio.gather(*(self.send(message) for message in messages), return_exceptions=True)
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def send(message: EmailMessage) -> Any:
+            async with semaphore:
+                return await self.send(message)
+
+        return await asyncio.gather(*(send(message) for message in messages), return_exceptions=True)
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop())
+
+
+smtp_pool = SMTPConnectionPool(
+    max_size=settings.SMTP_POOL_SIZE,
+    idle_timeout=settings.SMTP_POOL_IDLE_SECONDS,
+    max_messages=settings.SMTP_POOL_MAX_MESSAGES,
+    health_check_after=settings.SMTP_POOL_HEALTH_CHECK_SECONDS,
+)
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any
+
+from tortoise.signals import post_delete
+from tortoise.signals import post_save
+
+from app.core.config import settings
+from app.core.db_router import use_primary
+from app.core.user_lookup import get_user_by_id
+from app.models.user import User
+
+
+class CachedUser:
+    """
+    Compact snapshot of a user row
+    """
+
+    __slots__ = (
+        'created',
+        'email',
+        'fetched_at',
+        'first_name',
+        'id',
+        'is_active',
+        'is_staff',
+        'is_superuser',
+        'last_login',
+        'last_name',
+        'modified',
+        'password',
+    )
+    fields = (
+        'id',
+        'email',
+        'first_name',
+        'last_name',
+        'password',
+        'last_login',
+        'is_active',
+        'is_staff',
+        'is_superuser',
+        'created',
+        'modified',
+    )
+
+    def __init__(self, user: User) -> None:
+        for field in self.fields:
+            setattr(self, field, getattr(user, field))
+        self.fetched_at = time.monotonic()
+
+    def to_user(self) -> User:
+        return User._init_from_db(**{field: getattr(self, field) for field in self.fields})
+
+
+class UserCache:
+    """
+    Per worker LRU cache of users by id.
+
+    Entries are fresh for `ttl` seconds, then served for another `stale` seconds while a background task reloads them.
+    """
+
+    def __init__(self, max_size: int, ttl: float, stale: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.stale = stale
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Any, CachedUser] = OrderedDict()
+        self._generation = 0
+        self._refreshing: dict[Any, asyncio.Task[User | None]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get(self, user_id: Any) -> User | None:
+        record = self._data.get(user_id)
+        if record is not None:
+            age = time.monotonic() - record.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._data.move_to_end(user_id)
+                return record.to_user()
+            if age < self.ttl + self.stale:
+                self.stale_hits += 1
+                if user_id not in self._refreshing:
+                    task = asyncio.create_task(self.load(user_id))
+                    task.add_done_callback(lambda _: self._refreshing.pop(user_id, None))
+                    self._refreshing[user_id] = task
+                return record.to_user()
+        self.misses += 1
+        return await self.load(user_id)
+
+    async def load(self, user_id: Any) -> User | None:
+        generation = self._generation
+        # A lagging replica could refill the cache with a row that was just invalidated
+        with use_primary():
+            user = await get_user_by_id(user_id)
+        # Skip storing rows read before a concurrent invalidation
+        if user is not None and generation == self._generation:
+            self.set(user)
+        return user
+
+    def set(self, user: User) -> None:
+        if self.max_size <= 0:
+            return
+        self._data[user.id] = CachedUser(user)
+        self._data.move_to_end(user.id)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def invalidate(self, user_id: Any) -> None:
+        self._generation += 1
+        self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._data.clear()
+        self.hits = self.stale_hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+        }
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    stale=settings.USER_CACHE_STALE_SECONDS,
+)
+
+
+@post_save(User)
+async def _invalidate_saved_user(sender: type[User], instance: User, *args: Any) -> None:
+    user_cache.invalidate(instance.id)
+
+
+@post_delete(User)
+async def _invalidate_deleted_user(sender: type[User], instance: User, *args: Any) -> None:
+    user_cache.invalidate(instance.id)
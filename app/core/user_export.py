@@ -0,0 +1,85 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+
+from app.core.config import settings
+from app.core.db_router import PRIMARY
+from app.core.db_router import replicas
+from app.models.user import User
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+# UserOutput plus timestamps, never the password hash
+EXPORT_COLUMNS = ('id', 'email', 'first_name', 'last_name', 'is_active', 'is_superuser', 'created', 'last_login')
+# No ORDER BY, the cursor streams a sequential scan in storage order
+EXPORT_SQL = """
+SELECT "id", "email", "first_name", "last_name", "is_active", "is_superuser", "created", "last_login" FROM "user"
+"""
+
+
+async def _cursor_batches(client: BaseDBAsyncClient, fetch_size: int) -> AsyncIterator[Sequence[Sequence[Any]]]:
+    # A server-side cursor only lives inside a transaction, closing it ends the query
+    async with client.acquire_connection() as connection, connection.transaction(readonly=True):
+        cursor = await connection.cursor(EXPORT_SQL)
+        while rows := await cursor.fetch(fetch_size):
+            yield rows
+
+
+async def _keyset_batches(fetch_size: int) -> AsyncIterator[Sequence[Sequence[Any]]]:
+    last_id = 0
+    while rows := await User.filter(id__gt=last_id).order_by('id').limit(fetch_size).values_list(*EXPORT_COLUMNS):
+        yield rows
+        last_id = rows[-1][0]
+
+
+def user_batches(fetch_size: int = settings.USER_EXPORT_FETCH_SIZE) -> AsyncIterator[Sequence[Sequence[Any]]]:
+    """
+    User rows as tuples of EXPORT_COLUMNS, `fetch_size` at a time and read from a replica when one is healthy.
+    Postgres reads through a server-side cursor, other backends page by id.
+    """
+    client = connections.get(replicas.choose() or PRIMARY)
+    if client.capabilities.dialect == 'postgres':
+        return _cursor_batches(client, fetch_size)
+    return _keyset_batches(fetch_size)
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _csv_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+async def export_users(export_format: str, fetch_size: int = settings.USER_EXPORT_FETCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Encode every user as NDJSON or CSV, one chunk of bytes per fetch
+    """
+    batches = user_batches(fetch_size)
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(EXPORT_COLUMNS)
+        async for rows in batches:
+            writer.writerows([_csv_value(value) for value in row] for row in rows)
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+        return
+
+    encoder = json.JSONEncoder(default=_json_default, separators=(',', ':'))
+    async for rows in batches:
+        yield ''.join(encoder.encode(dict(zip(EXPORT_COLUMNS, row, strict=True))) + '\n' for row in rows).encode()
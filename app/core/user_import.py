@@ -0,0 +1,285 @@
+import asyncio
+import csv
+import itertools
+import json
+import math
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Any
+from typing import Literal
+
+from pydantic import ValidationError
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.core.security import run_password_job
+from app.core.user_cache import user_cache
+from app.schemas.user_schema import UserImport
+from app.schemas.user_schema import UserImportError
+from app.schemas.user_schema import UserImportResult
+
+IMPORT_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+# Line number, parsed fields or None, parse error or None
+ImportRow = tuple[int, dict[str, Any] | None, str | None]
+# Line number, email, (email, first name, last name, password hash) or None, errors
+PreparedRow = tuple[int, str | None, tuple[str, str, str, str] | None, list[str]]
+
+STAGING_COLUMNS = ('email', 'first_name', 'last_name', 'password', 'created')
+# Copies the user table's column types on every backend
+STAGE_SQL = """
+CREATE TEMP TABLE "user_import" AS
+SELECT "email", "first_name", "last_name", "password", "created" FROM "user" LIMIT 0
+"""
+STAGE_INSERT_SQL = 'INSERT INTO "user_import" VALUES (?, ?, ?, ?, ?)'
+# Superuser accounts are never overwritten by an import
+SUPERUSER_SQL = """
+SELECT s."email" FROM "user_import" s JOIN "user" u ON u."email" = s."email" WHERE u."is_superuser"
+"""
+UPDATE_SQL = """
+UPDATE "user" SET "first_name" = s."first_name", "last_name" = s."last_name", "password" = s."password",
+    "modified" = s."created"
+FROM "user_import" s WHERE "user"."email" = s."email" AND NOT "user"."is_superuser"
+RETURNING "user"."id", "user"."email"
+"""
+# WHERE true lets SQLite parse the upsert after a SELECT
+INSERT_SQL = """
+INSERT INTO "user" ("email", "first_name", "last_name", "password", "is_active", "is_staff", "is_superuser",
+    "created", "modified")
+SELECT "email", "first_name", "last_name", "password", false, false, false, "created", "created"
+FROM "user_import" WHERE true
+ON CONFLICT ("email") DO NOTHING
+RETURNING "email"
+"""
+
+
+async def _iter_lines(stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[tuple[int, bytes | None]]:
+    """
+    Numbered lines of the body, None for lines longer than `max_line_bytes`
+    """
+    buffer = b''
+    line = 0
+    skipping = False
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+        for data in lines:
+            line += 1
+            yield line, None if skipping or len(data) > max_line_bytes else data
+            skipping = False
+        if len(buffer) > max_line_bytes:
+            # Drop the rest of the line as it arrives instead of buffering it
+            skipping = True
+            buffer = b''
+    if buffer or skipping:
+        yield line + 1, None if skipping else buffer
+
+
+def _line_too_long(max_line_bytes: int) -> str:
+    return f'Line longer than {max_line_bytes} bytes'
+
+
+async def read_ndjson(stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[ImportRow]:
+    async for line, data in _iter_lines(stream, max_line_bytes):
+        if data is None:
+            yield line, None, _line_too_long(max_line_bytes)
+            continue
+        if not data.strip():
+            continue
+        try:
+            fields = json.loads(data)
+        except ValueError:
+            yield line, None, 'Invalid JSON'
+            continue
+        if not isinstance(fields, dict):
+            yield line, None, 'Expected a JSON object'
+            continue
+        yield line, fields, None
+
+
+async def read_csv(stream: AsyncIterator[bytes], max_line_bytes: int) -> AsyncIterator[ImportRow]:
+    """
+    CSV rows with a header line, quoted values can't contain line breaks since the body is split on them
+    """
+    header: list[str] | None = None
+    async for line, data in _iter_lines(stream, max_line_bytes):
+        if data is None:
+            yield line, None, _line_too_long(max_line_bytes)
+            continue
+        try:
+            text = data.decode().rstrip('\r')
+        except UnicodeDecodeError:
+            yield line, None, 'Invalid UTF-8'
+            continue
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line, None, f'Expected {len(header)} columns, got {len(values)}'
+            continue
+        # Empty cells are missing values, so rows can fill either password column
+        yield line, {name: value for name, value in zip(header, values, strict=True) if value != ''}, None
+
+
+def read_rows(
+    stream: AsyncIterator[bytes], import_format: str, max_line_bytes: int = settings.USER_IMPORT_MAX_LINE_BYTES
+) -> AsyncIterator[ImportRow]:
+    reader = read_csv if import_format == 'csv' else read_ndjson
+    return reader(stream, max_line_bytes)
+
+
+def _validation_errors(error: ValidationError) -> list[str]:
+    messages = []
+    for item in error.errors(include_url=False):
+        location = '.'.join(str(part) for part in item['loc'])
+        messages.append(f'{location}: {item["msg"]}' if location else item['msg'])
+    return messages
+
+
+def _valid_hash(value: str) -> bool:
+    # identify only matches the scheme prefix, parsing catches malformed hashes that would fail at login
+    scheme = pwd_context.identify(value)
+    if scheme is None:
+        return False
+    try:
+        pwd_context.handler(scheme).from_string(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def _prepare_rows(rows: list[ImportRow]) -> list[PreparedRow]:
+    """
+    Validate rows and hash their plain passwords, runs on the password hashing workers
+    """
+    prepared: list[PreparedRow] = []
+    for line, fields, error in rows:
+        if fields is None:
+            prepared.append((line, None, None, [str(error)]))
+            continue
+        try:
+            user = UserImport.model_validate(fields)
+        except ValidationError as e:
+            email = fields.get('email')
+            prepared.append((line, email if isinstance(email, str) else None, None, _validation_errors(e)))
+            continue
+        email = user.email.lower()
+        if user.password is not None:
+            password = pwd_context.hash(user.password)
+        elif user.password_hash is not None and _valid_hash(user.password_hash):
+            password = user.password_hash
+        else:
+            prepared.append((line, email, None, ['password_hash: Unsupported or malformed password hash']))
+            continue
+        prepared.append((line, email, (email, user.first_name, user.last_name, password), []))
+    return prepared
+
+
+class UserImporter:
+    """
+    Bulk user import.
+
+    Rows are validated with `UserImport` and written `chunk_size` at a time. Plain passwords are hashed across the
+    password hashing workers, `password_hash` values in a supported scheme are stored as they are. Every chunk is
+    staged in a temporary table, with COPY on Postgres, and merged into the user table in one transaction. Emails that
+    already exist are reported as failed rows, or have their names and password replaced with `on_conflict='update'`.
+    Superusers are never updated and always reported as failed rows. Like other password changes, an update leaves
+    the user's issued tokens valid until they expire.
+    """
+
+    def __init__(
+        self,
+        on_conflict: Literal['skip', 'update'] = 'skip',
+        chunk_size: int = settings.USER_IMPORT_CHUNK_SIZE,
+        max_errors: int = settings.USER_IMPORT_MAX_ERRORS,
+    ) -> None:
+        self.on_conflict = on_conflict
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.result = UserImportResult()
+        self._seen: set[str] = set()
+
+    def _fail(self, line: int, email: str | None, errors: list[str]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append(UserImportError(line=line, email=email, errors=errors))
+
+    async def run(self, rows: AsyncIterator[ImportRow]) -> UserImportResult:
+        chunk: list[ImportRow] = []
+        async for row in rows:
+            self.result.received += 1
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                await self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            await self.import_chunk(chunk)
+        return self.result
+
+    async def import_chunk(self, chunk: list[ImportRow]) -> None:
+        # Email validation and password hashing are CPU bound, so the chunk is split across the hashing workers
+        size = math.ceil(len(chunk) / max(1, settings.PASSWORD_HASH_WORKERS))
+        parts = await asyncio.gather(
+            *(run_password_job(_prepare_rows, chunk[i : i + size]) for i in range(0, len(chunk), size))
+        )
+
+        now = timezone.now()
+        valid: list[tuple[int, str]] = []
+        records = []
+        for line, email, record, errors in itertools.chain.from_iterable(parts):
+            if record is None:
+                self._fail(line, email, errors)
+            elif record[0] in self._seen:
+                self._fail(line, email, ['email: Duplicate email in this import'])
+            else:
+                self._seen.add(record[0])
+                valid.append((line, record[0]))
+                records.append((*record, now))
+        if not records:
+            return
+        created, updated, superusers = await self._merge(records)
+
+        for line, email in valid:
+            if email in created:
+                self.result.created += 1
+            elif email in updated:
+                self.result.updated += 1
+            elif email in superusers:
+                self._fail(line, email, ['email: Superusers can not be updated by an import'])
+            else:
+                self._fail(line, email, ['email: The user with this email already exists in the system'])
+
+    async def _merge(self, records: list[tuple[str, str, str, str, datetime]]) -> tuple[set[str], set[str], set[str]]:
+        async with in_transaction('default') as connection:
+            await connection.execute_script(STAGE_SQL)
+            if connection.capabilities.dialect == 'postgres':
+                async with connection.acquire_connection() as raw:
+                    await raw.copy_records_to_table('user_import', records=records, columns=STAGING_COLUMNS)
+            else:
+                await connection.execute_many(STAGE_INSERT_SQL, [list(record) for record in records])
+
+            updated = []
+            superusers = []
+            if self.on_conflict == 'update':
+                superusers = await connection.execute_query_dict(SUPERUSER_SQL)
+                updated = await connection.execute_query_dict(UPDATE_SQL)
+            created = await connection.execute_query_dict(INSERT_SQL)
+            await connection.execute_script('DROP TABLE "user_import"')
+
+        # Updated rows bypass post_save
+        for row in updated:
+            user_cache.invalidate(row['id'])
+        return (
+            {row['email'] for row in created},
+            {row['email'] for row in updated},
+            {row['email'] for row in superusers},
+        )
@@ -0,0 +1,51 @@
+from typing import Any
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.router import router
+
+from app.models.user import User
+
+# Fixed statements skip query building, asyncpg prepares them once per connection in its statement cache
+STATEMENTS = {
+    'postgres': {
+        'id': 'SELECT * FROM "user" WHERE "id" = $1',
+        # Matches the LOWER("email") index
+        'email': 'SELECT * FROM "user" WHERE LOWER("email") = $1',
+    },
+    'sqlite': {
+        'id': 'SELECT * FROM "user" WHERE "id" = ?',
+        'email': 'SELECT * FROM "user" WHERE LOWER("email") = ?',
+    },
+}
+
+
+def _read_client() -> BaseDBAsyncClient:
+    # Same choice as a queryset read, so replicas, use_primary and transactions apply
+    return router.db_for_read(User) or User._meta.db
+
+
+async def _fetch_user(client: BaseDBAsyncClient, query: str, value: Any) -> User | None:
+    rows = await client.execute_query_dict(query, [value])
+    return User._init_from_db(**rows[0]) if rows else None
+
+
+async def get_user_by_id(user_id: Any) -> User | None:
+    """
+    `User.get_or_none(id=user_id)` without building the query, the ORM is used on other backends
+    """
+    client = _read_client()
+    statements = STATEMENTS.get(client.capabilities.dialect)
+    if statements is None:
+        return await User.get_or_none(id=user_id)
+    return await _fetch_user(client, statements['id'], User._meta.pk.to_db_value(user_id, User))
+
+
+async def get_user_by_email(email: str) -> User | None:
+    """
+    `User.get_by_email(email)` without building the query, the ORM is used on other backends
+    """
+    client = _read_client()
+    statements = STATEMENTS.get(client.capabilities.dialect)
+    if statements is None:
+        return await User.get_by_email(email)
+    return await _fetch_user(client, statements['email'], email.lower())
@@ -0,0 +1,74 @@
+import logging
+from typing import Any
+
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.expressions import Q
+from tortoise.router import router
+
+from app.models.user import User
+from app.schemas.user_schema import UserOutput
+
+logger = logging.getLogger(__name__)
+
+# Trigrams need three characters
+SEARCH_MIN_LENGTH = 3
+
+# The concatenation must match the expression of the idx_user_search_trgm GIN index. Rows containing the query as a
+# substring or a word similar to it match, ranked by word similarity.
+POSTGRES_SEARCH_SQL = """
+SELECT "id", "email", "first_name", "last_name", "is_active", "is_superuser"
+FROM "user"
+WHERE (LOWER("email") || ' ' || LOWER("first_name") || ' ' || LOWER("last_name")) LIKE $2
+    OR $1 <% (LOWER("email") || ' ' || LOWER("first_name") || ' ' || LOWER("last_name"))
+ORDER BY word_similarity($1, LOWER("email") || ' ' || LOWER("first_name") || ' ' || LOWER("last_name")) DESC, "id"
+LIMIT $3
+"""
+TRGM_INSTALLED_SQL = "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+
+# Connection name -> whether pg_trgm is installed, checked once per connection
+_trgm_installed: dict[str, bool] = {}
+
+
+def _like_pattern(query: str) -> str:
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'%{escaped}%'
+
+
+async def _search_postgres(client: BaseDBAsyncClient, query: str, limit: int) -> list[dict[str, Any]]:
+    return await client.execute_query_dict(POSTGRES_SEARCH_SQL, [query, _like_pattern(query), limit])
+
+
+async def _has_trgm(client: BaseDBAsyncClient) -> bool:
+    # Schemas built by generate_schemas skip the migration that installs pg_trgm
+    installed = _trgm_installed.get(client.connection_name)
+    if installed is None:
+        installed = bool(await client.execute_query_dict(TRGM_INSTALLED_SQL))
+        _trgm_installed[client.connection_name] = installed
+        if not installed:
+            logger.warning('pg_trgm is not installed, user search falls back to a LIKE scan, run `aerich upgrade`')
+    return installed
+
+
+async def _search_like(query: str, limit: int) -> list[dict[str, Any]]:
+    # Unindexed substring match, ranked by email
+    return (
+        await User
+        .filter(Q(email__icontains=query) | Q(first_name__icontains=query) | Q(last_name__icontains=query))
+        .order_by('email', 'id')
+        .limit(limit)
+        .values(*UserOutput.model_fields)
+    )
+
+
+async def search_users(query: str, limit: int) -> list[dict[str, Any]]:
+    """
+    Users whose email, first or last name match `query`, best matches first. Postgres ranks by trigram word
+    similarity using the pg_trgm index, other backends and databases without pg_trgm fall back to a LIKE scan.
+    """
+    query = query.strip().lower()
+    if len(query) < SEARCH_MIN_LENGTH:
+        return []
+    client = router.db_for_read(User) or User._meta.db
+    if client.capabilities.dialect == 'postgres' and await _has_trgm(client):
+        return await _search_postgres(client, query, limit)
+    return await _search_like(query, limit)
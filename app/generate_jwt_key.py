@@ -0,0 +1,38 @@
+"""
+Generate a JWT signing key as <JWT_KEYS_DIR>/<kid>.pem.
+
+    python -m app.generate_jwt_key --algorithm EdDSA --kid 2025-01
+"""
+
+import argparse
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from app.core.config import settings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--algorithm', choices=['EdDSA', 'ES256'], default=settings.JWT_ALGORITHM)
+    parser.add_argument('--kid', required=True)
+    parser.add_argument('--keys-dir', default=settings.JWT_KEYS_DIR, required=settings.JWT_KEYS_DIR is None)
+    args = parser.parse_args()
+
+    key = ed25519.Ed25519PrivateKey.generate() if args.algorithm == 'EdDSA' else ec.generate_private_key(ec.SECP256R1())
+    pem = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    path = Path(args.keys_dir) / f'{args.kid}.pem'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(pem)
+    path.chmod(0o600)
+    print(f'wrote {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,10 @@
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack
 from contextlib import asynccontextmanager
 from http import HTTPStatus
+from typing import Any
 
 import sentry_sdk
 from fastapi import FastAPI
@@ -7,15 +12,28 @@ from fastapi import HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.routing import APIRoute
 from fastapi.routing import APIRouter
-from fastapi_pagination import add_pagination
 from tortoise import Tortoise
 from tortoise.exceptions import DoesNotExist
 
+from app.core import jwt_keys
+from app.core import security
+from app.core.broadcast import broadcaster
 from app.core.config import settings
+from app.core.db import warm_connections
+from app.core.db_router import replicas
+from app.core.emails import email_templates
+from app.core.last_login import last_login_buffer
+from app.core.migrations import check_migrations
+from app.core.outbox import outbox_worker
+from app.core.smtp_pool import smtp_pool
 from app.routes import app_router
 from app.routes import auth_router
+from app.routes import broadcast_router
+from app.routes import jwks_router
 from app.routes import user_router
 
+logger = logging.getLogger(__name__)
+
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f'{route.tags[0]}-{route.name}'
@@ -27,39 +45,93 @@ if settings.SENTRY_DSN and settings.ENVIRONMENT != 'local':
 # setup database
 MODELS = [
     'aerich.models',
+    'app.models.broadcast',
+    'app.models.outbox',
+    'app.models.token',
     'app.models.user',
 ]
 
+
+def postgres_connection(host: str, port: int) -> dict[str, Any]:
+    # Dict format for connection
+    return {
+        'engine': 'app.core.db',
+        'credentials': {
+            'host': host,
+            'port': port,
+            'user': settings.POSTGRES_USER,
+            'password': settings.POSTGRES_PASSWORD,
+            'database': settings.POSTGRES_DB,
+            'minsize': settings.POSTGRES_POOL_MIN_SIZE,
+            'maxsize': settings.POSTGRES_POOL_MAX_SIZE,
+            'max_inactive_connection_lifetime': settings.POSTGRES_POOL_MAX_INACTIVE_SECONDS,
+            'statement_cache_size': settings.POSTGRES_STATEMENT_CACHE_SIZE,
+            'command_timeout': settings.POSTGRES_COMMAND_TIMEOUT_SECONDS,
+        },
+    }
+
+
 TORTOISE_ORM = {
     'connections': {
-        # Dict format for connection
-        'default': {
-            'engine': 'tortoise.backends.asyncpg',
-            'credentials': {
-                'host': settings.POSTGRES_SERVER,
-                'port': settings.POSTGRES_PORT,
-                'user': settings.POSTGRES_USER,
-                'password': settings.POSTGRES_PASSWORD,
-                'database': settings.POSTGRES_DB,
-            },
-        }
+        'default': postgres_connection(settings.POSTGRES_SERVER, settings.POSTGRES_PORT),
+        # Reads are routed to these by app.core.db_router
+        **{
+            alias: postgres_connection(host, port)
+            for alias, (host, port) in zip(replicas.aliases, settings.postgres_replicas, strict=True)
+        },
     },
-    'apps': {'app': {'models': MODELS}},
+    'apps': {'app': {'models': MODELS, 'default_connection': 'default'}},
+    'routers': ['app.core.db_router.ReplicaRouter'] if replicas.aliases else [],
     'use_tz': False,
     'timezone': 'UTC',
 }
 
 
 @asynccontextmanager
-async def lifespan(app: FastAPI):
-    # Register Tortoise ORM
-    await Tortoise.init(
-        config=TORTOISE_ORM,
-    )
-
-    # Generate the schema
-    await Tortoise.generate_schemas()  # TODO remove for production
-    yield
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    start = time.perf_counter()
+    # Cleanups run in reverse order whether startup, the app or another cleanup fails
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(Tortoise.close_connections)
+        # Register Tortoise ORM
+        await Tortoise.init(
+            config=TORTOISE_ORM,
+        )
+
+        # Deployments migrate with `aerich upgrade` once, workers only check the applied version
+        if settings.db_schema_mode == 'check':
+            await check_migrations()
+        else:
+            await Tortoise.generate_schemas()
+
+        # Open the pools now rather than on the first requests
+        await warm_connections()
+        # Best effort, unreachable replicas are marked unhealthy and their reads go to the primary
+        await replicas.check()
+
+        # Parse JWT signing keys
+        jwt_keys.init_jwt_keys()
+
+        # Compile email templates
+        email_templates.load()
+
+        # Start password hashing workers
+        security.start_password_executor()
+        stack.callback(security.shutdown_password_executor)
+        stack.push_async_callback(smtp_pool.close)
+        last_login_buffer.start()
+        stack.push_async_callback(last_login_buffer.stop)
+        outbox_worker.start()
+        stack.push_async_callback(outbox_worker.stop)
+        replicas.start()
+        stack.push_async_callback(replicas.stop)
+        broadcaster.start()
+        stack.push_async_callback(broadcaster.stop)
+
+        # Build the cached OpenAPI schema before the first /docs request
+        app.openapi()
+        logger.info('startup complete in %.3fs', time.perf_counter() - start)
+        yield
 
 
 app = FastAPI(
@@ -85,8 +157,9 @@ api_router = APIRouter()
 api_router.include_router(app_router.router, tags=['utils'])
 api_router.include_router(auth_router.router, tags=['auth'])
 api_router.include_router(user_router.router, prefix='/users', tags=['users'])
+api_router.include_router(broadcast_router.router, prefix='/broadcasts', tags=['broadcasts'])
 app.include_router(api_router, prefix=settings.API_V1_STR)
-add_pagination(app)
+app.include_router(jwks_router.router, tags=['auth'])
 
 
 # Global Exception
@@ -96,3 +169,11 @@ async def validation_exception_handler(request, exc):
         status_code=HTTPStatus.NOT_FOUND,
         detail=HTTPStatus.NOT_FOUND.phrase,
     )
+
+
+@app.exception_handler(security.PasswordHasherBusy)
+async def password_hasher_busy_handler(request, exc):
+    raise HTTPException(
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        detail=HTTPStatus.SERVICE_UNAVAILABLE.phrase,
+    )
@@ -1,5 +1,10 @@
+from typing import Any
+
 from tortoise import fields
 from tortoise import models
+from tortoise import timezone
+from tortoise.exceptions import DoesNotExist
+from typing_extensions import Self
 
 
 class BaseDBModel(models.Model):
@@ -14,6 +19,25 @@ class BaseDBModel(models.Model):
     class PydanticMeta:
         exclude = ['created', 'modified']
 
+    @classmethod
+    async def update_returning(cls, pk: Any, **values: Any) -> Self:
+        """
+        Write only `values` to the row with primary key `pk` and read it back in one UPDATE ... RETURNING.
+
+        Runs as a queryset update, so post_save signals do not fire.
+        """
+        query = cls.filter(pk=pk).update(**values, modified=timezone.now())
+        # Tortoise has no UPDATE ... RETURNING, this relies on UpdateQuery internals as of tortoise-orm 0.21.7
+        # (_choose_db, _make_query, query and values) and Model._init_from_db. Recheck it when upgrading Tortoise,
+        # keep other code on the public API and go through this helper.
+        # Same connection choice as awaiting the update, the statement is then extended with RETURNING
+        query._db = query._choose_db(for_write=True)
+        query._make_query()
+        rows = await query._db.execute_query_dict(f'{query.query} RETURNING *', query.values)
+        if not rows:
+            raise DoesNotExist(cls)
+        return cls._init_from_db(**rows[0])
+
 
 class BaseAuditedDBModel(BaseDBModel):
     created_by = fields.BigIntField()
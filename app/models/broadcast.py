@@ -0,0 +1,33 @@
+from datetime import datetime
+from enum import Enum
+from typing import Any
+
+from tortoise import fields
+
+from app.models.base import BaseAuditedDBModel
+
+
+class BroadcastState(str, Enum):
+    RUNNING = 'running'
+    DONE = 'done'
+
+
+class Broadcast(BaseAuditedDBModel):
+    template_name = fields.CharField(max_length=255)
+    subject = fields.CharField(max_length=255)
+    context: dict[str, Any] = fields.JSONField(default=dict)
+    # User field filters, e.g. {"is_active": true}
+    filters: dict[str, Any] = fields.JSONField(default=dict)
+    state = fields.CharEnumField(BroadcastState, max_length=16, default=BroadcastState.RUNNING)
+    # Keyset position, recipients are delivered in id order and the job resumes after this id
+    last_user_id = fields.BigIntField(default=0)
+    sent = fields.IntField(default=0)
+    failed = fields.IntField(default=0)
+    # Held by the worker running the job, so only one process resumes it. Progress is only saved by the holder
+    # of `lease_token`
+    lease_until: datetime | None = fields.DatetimeField(null=True)
+    lease_token = fields.UUIDField(null=True)
+    finished_at: datetime | None = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = 'broadcast'
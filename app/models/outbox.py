@@ -0,0 +1,28 @@
+from enum import Enum
+
+from tortoise import fields
+
+from app.models.base import BaseDBModel
+
+
+class OutboxState(str, Enum):
+    PENDING = 'pending'
+    SENT = 'sent'
+    DEAD = 'dead'
+
+
+class Outbox(BaseDBModel):
+    email_to = fields.CharField(max_length=100)
+    subject = fields.CharField(max_length=255)
+    # Cleared once sent, the content can carry live reset and verification tokens
+    html_content = fields.TextField(null=True)
+    state = fields.CharEnumField(OutboxState, max_length=16, default=OutboxState.PENDING)
+    attempts = fields.IntField(default=0)
+    # Next delivery attempt, claimed rows are leased by moving it forward
+    available_at = fields.DatetimeField()
+    last_error = fields.TextField(null=True)
+    sent_at = fields.DatetimeField(null=True)
+
+    class Meta:
+        table = 'outbox'
+        indexes = [('state', 'available_at')]
@@ -0,0 +1,12 @@
+from tortoise import fields
+
+from app.models.base import BaseDBModel
+
+
+class RevokedToken(BaseDBModel):
+    # `jti:<jti>` for used refresh tokens, `family:<family>` for revoked refresh token families
+    key = fields.CharField(max_length=64, unique=True)
+    expires = fields.DatetimeField(db_index=True)
+
+    class Meta:
+        table = 'revoked_token'
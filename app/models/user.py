@@ -1,6 +1,7 @@
 from typing import Optional
 
 from tortoise import fields
+from tortoise.functions import Lower
 
 from app.core import security
 from app.models.base import BaseDBModel
@@ -23,13 +24,17 @@ class User(BaseDBModel):
 
     @classmethod
     async def get_by_email(cls, email: str) -> Optional['User']:
-        query = cls.get_or_none(email=email.lower())
+        # Matches the LOWER("email") index, so rows stored with mixed case are still found
+        query = cls.annotate(email_lower=Lower('email')).get_or_none(email_lower=email.lower())
         user = await query
         return user
 
     @classmethod
     async def create(cls, user: UserCreate) -> 'User':
-        hashed_password = security.get_password_hash(password=user.password)
+        """
+        Insert the user in one statement, a taken email raises IntegrityError from the unique constraint
+        """
+        hashed_password = await security.hash_password(password=user.password)
         user.password = hashed_password
         user.email = user.email.lower()
 
@@ -38,15 +43,21 @@ class User(BaseDBModel):
         return model
 
     @classmethod
-    async def update(cls, user: 'User', update: UserUpdate) -> 'User':
-        if update.email:
-            user.email = update.email
-        if update.first_name:
-            user.first_name = update.first_name
-        if update.last_name:
-            user.last_name = update.last_name
-
-        await user.save()
+    async def update(cls, user_id: int, update: UserUpdate) -> 'User':
+        """
+        Write the fields set in `update` and return the updated row, a taken email raises IntegrityError.
+        The user is dropped from the user cache, which post_save would do for a model save.
+        """
+        # app.core.user_cache imports this module
+        from app.core.user_cache import user_cache
+
+        values = update.model_dump(exclude_unset=True, exclude_none=True)
+        if 'email' in values:
+            values['email'] = values['email'].lower()
+        if not values:
+            return await cls.get(id=user_id)
+        user = await cls.update_returning(user_id, **values)
+        user_cache.invalidate(user.id)
         return user
 
     class PydanticMeta:
@@ -1,13 +1,20 @@
 from http import HTTPStatus
+from typing import Any
 
 from fastapi import APIRouter
 from fastapi import HTTPException
 
+from app.core.authentication import SuperUser
 from app.core.config import settings
+from app.core.db import pool_stats
+from app.core.db_router import replicas
 from app.core.emails import generate_reset_password_email
 from app.core.emails import generate_verification_email
-from app.core.emails import send_email
-from app.models.user import User
+from app.core.outbox import enqueue_email
+from app.core.outbox import outbox_counts
+from app.core.outbox import outbox_worker
+from app.core.rate_limit import rate_limit
+from app.core.user_lookup import get_user_by_email
 from app.schemas.auth_schema import Email
 from app.schemas.auth_schema import Message
 
@@ -19,12 +26,31 @@ async def health_check() -> bool:
     return True
 
 
-@router.post('/resend-verification')
+@router.get('/outbox', dependencies=[SuperUser])
+async def outbox_status() -> dict[str, int]:
+    """
+    Outbox email counts per state
+    """
+    return await outbox_counts()
+
+
+@router.get('/db-pool', dependencies=[SuperUser])
+async def db_pool_status() -> dict[str, Any]:
+    """
+    Database pool and replica usage of the worker serving the request
+    """
+    return {**pool_stats(), **replicas.stats()}
+
+
+@router.post(
+    '/resend-verification',
+    dependencies=[rate_limit('resend_verification', 'RATE_LIMIT_RESEND_VERIFICATION')],
+)
 async def resend_verification(body: Email) -> Message:
     """
     Resend Verification Email
     """
-    user = await User.get_by_email(body.email)
+    user = await get_user_by_email(body.email)
     if not user:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
@@ -38,31 +64,29 @@ async def resend_verification(body: Email) -> Message:
     if settings.emails_enabled and user.email:
         email_data = generate_verification_email(email_to=user.email, first_name=user.first_name)
 
-        send_email(
-            email_to=user.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+        await enqueue_email(user.email, email_data)
+        outbox_worker.wake()
     return Message(message='Verification email sent. Please check your inbox')
 
 
-@router.post('/password-recovery')
+@router.post(
+    '/password-recovery',
+    dependencies=[rate_limit('password_recovery', 'RATE_LIMIT_PASSWORD_RECOVERY')],
+)
 async def recover_password(body: Email) -> Message:
     """
     Password Recovery
     """
-    user = await User.get_by_email(email=body.email)
+    user = await get_user_by_email(body.email)
 
     if not user:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND,
             detail=HTTPStatus.NOT_FOUND.phrase,
         )
-    email_data = generate_reset_password_email(email_to=user.email, first_name=user.first_name)
+    if settings.emails_enabled:
+        email_data = generate_reset_password_email(email_to=user.email, first_name=user.first_name)
 
-    send_email(
-        email_to=user.email,
-        subject=email_data.subject,
-        html_content=email_data.html_content,
-    )
+        await enqueue_email(user.email, email_data)
+        outbox_worker.wake()
     return Message(message='Password recovery email sent. Please check your inbox')
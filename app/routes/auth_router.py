@@ -1,4 +1,6 @@
 from datetime import datetime
+from datetime import timedelta
+from datetime import timezone
 from http import HTTPStatus
 from typing import Annotated
 
@@ -10,65 +12,100 @@ from fastapi import Response
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.core import security
+from app.core.authentication import get_user
 from app.core.config import settings
+from app.core.last_login import last_login_buffer
+from app.core.rate_limit import rate_limit
+from app.core.revocation import revocations
 from app.core.security import create_access_token
 from app.core.security import create_refresh_token
-from app.core.security import verify_token
-from app.models.user import User
+from app.core.security import decode_token
+from app.core.user_lookup import get_user_by_email
 from app.schemas.auth_schema import Token
 
 router = APIRouter()
 
 
-@router.post('/login', response_model=Token)
+def set_refresh_cookie(response: Response, refresh_token: str) -> None:
+    response.set_cookie(
+        key='refresh_token',
+        value=refresh_token,
+        httponly=True,
+        secure=True,
+        samesite='Lax',
+        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+    )
+
+
+async def revoke_family(family: str) -> None:
+    # A family can not outlive the newest refresh token issued in it
+    expires = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    await revocations.revoke(f'family:{family}', expires)
+
+
+@router.post('/login', response_model=Token, dependencies=[rate_limit('login', 'RATE_LIMIT_LOGIN')])
 async def login_for_access_token(
     response: Response, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> dict[str, str]:
-    user = await User.get_by_email(email=form_data.username)
+    user = await get_user_by_email(form_data.username)
+
+    if user is None or user.is_active is False:
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
 
-    if user is None or user.is_active is False or security.verify_password(form_data.password, user.password) is False:
+    verified, new_hash = await security.verify_and_update_password(form_data.password, user.password)
+    if verified is False:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
 
     access_token = create_access_token(user.id)
-    refresh_token = create_refresh_token(user.id)
-    max_age = settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+    set_refresh_cookie(response, create_refresh_token(user.id))
 
-    response.set_cookie(
-        key='refresh_token',
-        value=refresh_token,
-        httponly=True,
-        secure=True,
-        samesite='Lax',
-        max_age=max_age,
-    )
+    # Upgrade outdated password hash
+    if new_hash:
+        user.password = new_hash
+        await user.save(update_fields=['password'])
 
-    # Update last login
-    user.last_login = datetime.now()
-    await user.save()
+    await last_login_buffer.record(user.id, datetime.now())
 
     return Token(access_token=access_token)
 
 
 @router.post('/login/refresh', response_model=Token)
-async def refresh_access_token(request: Request) -> dict[str, str]:
+async def refresh_access_token(request: Request, response: Response) -> dict[str, str]:
+    """
+    Rotate the refresh token, reusing a rotated token revokes its whole family
+    """
     refresh_token = request.cookies.get('refresh_token')
     if not refresh_token:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
 
-    user_id = verify_token(refresh_token, 'refresh')
-    if not user_id:
+    claims = decode_token(refresh_token, 'refresh')
+    if not claims or 'jti' not in claims or 'family' not in claims:
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
+
+    family = claims['family']
+    if await revocations.is_revoked(f'family:{family}'):
+        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
+    expires = datetime.fromtimestamp(claims['exp'], timezone.utc).replace(tzinfo=None)
+    if not await revocations.revoke(f'jti:{claims["jti"]}', expires):
+        await revoke_family(family)
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
 
-    user = await User.get_or_none(id=user_id)
+    user_id = claims['user_id']
+    user = await get_user(user_id)
     if not user:
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail=HTTPStatus.UNAUTHORIZED.phrase)
 
+    set_refresh_cookie(response, create_refresh_token(user_id, family=family))
     new_access_token = create_access_token(user_id)
     return Token(access_token=new_access_token)
 
 
 @router.post('/logout', status_code=HTTPStatus.OK)
-async def logout(response: Response) -> dict[str, str]:
+async def logout(request: Request, response: Response) -> dict[str, str]:
+    refresh_token = request.cookies.get('refresh_token')
+    claims = decode_token(refresh_token, 'refresh') if refresh_token else None
+    if claims and 'family' in claims:
+        await revoke_family(claims['family'])
     response.delete_cookie(key='refresh_token')
     response.status_code = HTTPStatus.OK
     return response
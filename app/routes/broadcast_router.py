@@ -0,0 +1,55 @@
+from http import HTTPStatus
+
+from fastapi import APIRouter
+from fastapi import HTTPException
+
+from app.core.authentication import SuperUser
+from app.core.broadcast import broadcaster
+from app.core.config import settings
+from app.core.emails import email_templates
+from app.models.broadcast import Broadcast
+from app.models.user import User
+from app.schemas.broadcast_schema import BroadcastCreate
+from app.schemas.broadcast_schema import BroadcastOutput
+
+router = APIRouter()
+
+
+@router.post(
+    '',
+    response_model=BroadcastOutput,
+    status_code=HTTPStatus.ACCEPTED,
+)
+async def create_broadcast(
+    broadcast_in: BroadcastCreate,
+    current_user: User = SuperUser,
+) -> Broadcast:
+    """
+    Email every user matching the filters, progress is reported by GET /broadcasts/{id}
+    """
+    if not settings.emails_enabled:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Emails are not configured',
+        )
+    if not email_templates.exists(broadcast_in.template_name):
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Unknown email template',
+        )
+    return await broadcaster.create(broadcast_in, created_by=current_user.id)
+
+
+@router.get(
+    '/{id}',
+    dependencies=[SuperUser],
+    response_model=BroadcastOutput,
+    status_code=HTTPStatus.OK,
+)
+async def get_broadcast(
+    id: int,
+) -> Broadcast:
+    """
+    Get a broadcast and its progress.
+    """
+    return await Broadcast.get(id=id)
@@ -0,0 +1,18 @@
+from typing import Any
+
+from fastapi import APIRouter
+from fastapi import Response
+
+from app.core.config import settings
+from app.core.jwt_keys import get_jwt_keys
+
+router = APIRouter()
+
+
+@router.get('/.well-known/jwks.json')
+async def jwks(response: Response) -> dict[str, Any]:
+    """
+    Public keys for verifying access tokens
+    """
+    response.headers['Cache-Control'] = f'public, max-age={settings.JWKS_MAX_AGE_SECONDS}'
+    return get_jwt_keys().jwks
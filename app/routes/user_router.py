@@ -1,21 +1,43 @@
 from http import HTTPStatus
+from typing import Annotated
+from typing import Literal
 
 from fastapi import APIRouter
 from fastapi import HTTPException
-from fastapi_pagination import Page
-from fastapi_pagination.ext.tortoise import paginate
+from fastapi import Query
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
+from tortoise.exceptions import DoesNotExist
+from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 
 from app.core import emails
 from app.core.authentication import CurrentUser
 from app.core.authentication import SuperUser
 from app.core.authentication import UserFromEmailToken
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.fieldsets import sparse_fields
+from app.core.outbox import enqueue_email
+from app.core.outbox import outbox_worker
+from app.core.pagination import CursorPage
+from app.core.pagination import paginate_keyset
+from app.core.rate_limit import rate_limit
+from app.core.security import hash_password
 from app.core.security import verify_password
+from app.core.user_export import EXPORT_FORMATS
+from app.core.user_export import export_users
+from app.core.user_lookup import get_user_by_id
+from app.core.user_search import SEARCH_MIN_LENGTH
+from app.core.user_search import search_users
+from app.core.user_import import IMPORT_FORMATS
+from app.core.user_import import read_rows
+from app.core.user_import import UserImporter
 from app.models.user import User
 from app.schemas.user_schema import ResetPassword
 from app.schemas.user_schema import UpdatePassword
 from app.schemas.user_schema import UserCreate
+from app.schemas.user_schema import UserImportResult
 from app.schemas.user_schema import UserOutput
 from app.schemas.user_schema import UserOutputPublic
 from app.schemas.user_schema import UserUpdate
@@ -23,7 +45,12 @@ from app.schemas.user_schema import UserUpdate
 router = APIRouter()
 
 
-@router.post('/register', response_model=UserOutput, status_code=HTTPStatus.CREATED)
+@router.post(
+    '/register',
+    dependencies=[rate_limit('register', 'RATE_LIMIT_REGISTER')],
+    response_model=UserOutput,
+    status_code=HTTPStatus.CREATED,
+)
 async def register_user(
     *,
     user_in: UserCreate,
@@ -31,34 +58,32 @@ async def register_user(
     """
     Create new user.
     """
-    existing_user = await User.get_by_email(email=user_in.email)
-    if existing_user:
-        raise HTTPException(
-            status_code=HTTPStatus.CONFLICT,
-            detail='The user with this email already exists in the system',
-        )
-
-    user = await User.create(user_in)
+    async with in_transaction('default'):
+        try:
+            user = await User.create(user_in)
+        except IntegrityError as e:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='The user with this email already exists in the system',
+            ) from e
 
-    if settings.emails_enabled and user_in.email:
-        email_data = emails.generate_verification_email(email_to=user.email, first_name=user.first_name)
+        if settings.emails_enabled and user_in.email:
+            email_data = emails.generate_verification_email(email_to=user.email, first_name=user.first_name)
 
-        emails.send_email(
-            email_to=user.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+            await enqueue_email(user.email, email_data)
+    outbox_worker.wake()
     return user
 
 
 @router.get('/current', response_model=UserOutputPublic, status_code=HTTPStatus.OK)
 def get_current_user(
     current_user: CurrentUser,
+    fields: Annotated[tuple[str, ...], sparse_fields(UserOutputPublic)],
 ):
     """
     Get current user.
     """
-    return current_user
+    return JSONResponse({name: getattr(current_user, name) for name in fields})
 
 
 @router.put('/current/password', status_code=HTTPStatus.NO_CONTENT)
@@ -66,11 +91,12 @@ async def update_current_user_password(user_in: UpdatePassword, current_user: Cu
     """
     Update own password.
     """
-    if verify_password(user_in.old_password, current_user.password) is False:
+    if await verify_password(user_in.old_password, current_user.password) is False:
         raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Incorrect password')
 
-    current_user.password = get_password_hash(user_in.new_password_1)
-    await current_user.save()
+    current_user.password = await hash_password(user_in.new_password_1)
+    # The current user may come from the cache, only write the columns that changed
+    await current_user.save(update_fields=['password', 'modified'])
 
 
 @router.put('/current', response_model=UserOutputPublic, status_code=HTTPStatus.OK)
@@ -78,7 +104,14 @@ async def update_current_user(user_in: UserUpdate, current_user: CurrentUser):
     """
     Update own user.
     """
-    return await User.update(current_user, user_in)
+    try:
+        user = await User.update(current_user.id, user_in)
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='The email already exist in the system',
+        ) from e
+    return user
 
 
 @router.delete('/current', status_code=HTTPStatus.ACCEPTED)
@@ -91,28 +124,62 @@ async def remove_current_user(current_user: CurrentUser):
             email_to=current_user.email, first_name=current_user.first_name
         )
 
-        emails.send_email(
-            email_to=current_user.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+        await enqueue_email(current_user.email, email_data)
+        outbox_worker.wake()
 
 
 @router.get(
     '',
     dependencies=[SuperUser],
-    response_model=Page[UserOutput],
+    response_model=CursorPage[UserOutput],
     status_code=HTTPStatus.OK,
 )
 async def get_all_user(
-    limit: int = 100,
-    offset: int = 0,
+    fields: Annotated[tuple[str, ...], sparse_fields(UserOutput)],
+    cursor: str | None = None,
+    size: int = Query(50, ge=1, le=100),
+    include_total: bool = False,
 ):
     """
-    Retrieve users.
+    Retrieve users, newest first. Pass the returned `next_cursor` as `cursor` for the next page.
     """
-    query = User.all().limit(limit).offset(offset)
-    return await paginate(query)
+    page = await paginate_keyset(User.all(), 'users', cursor, size, include_total=include_total, fields=fields)
+    # Rows only hold the selected columns, skip validating them against the response model again
+    return JSONResponse(page.model_dump())
+
+
+@router.get(
+    '/export',
+    dependencies=[SuperUser],
+    response_class=StreamingResponse,
+    status_code=HTTPStatus.OK,
+    responses={HTTPStatus.OK: {'content': {media_type: {} for media_type in EXPORT_FORMATS.values()}}},
+)
+async def export_all_users(export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format')):
+    """
+    Stream every user as NDJSON or CSV, without password hashes.
+    """
+    return StreamingResponse(
+        export_users(export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename="users.{export_format}"'},
+    )
+
+
+@router.get(
+    '/search',
+    dependencies=[SuperUser],
+    response_model=list[UserOutput],
+    status_code=HTTPStatus.OK,
+)
+async def search_all_users(
+    q: str = Query(min_length=SEARCH_MIN_LENGTH, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """
+    Find users by part of their email, first or last name, best matches first.
+    """
+    return JSONResponse(await search_users(q, limit))
 
 
 @router.get(
@@ -123,11 +190,15 @@ async def get_all_user(
 )
 async def get_user(
     id: int,
+    fields: Annotated[tuple[str, ...], sparse_fields(UserOutput)],
 ):
     """
     Get a specific user by id.
     """
-    return await User.get(id=id)
+    user = await User.filter(id=id).first().values(*fields)
+    if user is None:
+        raise DoesNotExist(User)
+    return JSONResponse(user)
 
 
 @router.post(
@@ -140,19 +211,44 @@ async def create_user(*, user_in: UserCreate):
     """
     Create new user.
     """
-    existing_user = await User.get_by_email(email=user_in.email)
-    if existing_user:
+    try:
+        user = await User.create(user_in)
+    except IntegrityError as e:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='The user with this username already exists in the system',
-        )
-
-    hashed_password = get_password_hash(user_in.password)
-    db_user = UserCreate(**user_in.create_update_dict(), hashed_password=hashed_password)
-    user = await User.create(db_user)
+        ) from e
     return user
 
 
+@router.post(
+    '/import',
+    dependencies=[SuperUser],
+    response_model=UserImportResult,
+    status_code=HTTPStatus.OK,
+    openapi_extra={
+        'requestBody': {
+            'required': True,
+            'content': {content_type: {'schema': {'type': 'string'}} for content_type in IMPORT_FORMATS},
+        }
+    },
+)
+async def import_users(request: Request, on_conflict: Literal['skip', 'update'] = 'skip'):
+    """
+    Create users in bulk from an NDJSON or CSV body, one user per line. Rows set either `password` or
+    `password_hash`, the report lists the rows that failed. `on_conflict=update` replaces the names and password of
+    existing users, except superusers.
+    """
+    content_type = request.headers.get('content-type', '').partition(';')[0].strip()
+    import_format = IMPORT_FORMATS.get(content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=HTTPStatus.UNSUPPORTED_MEDIA_TYPE,
+            detail=f'Send one of {", ".join(IMPORT_FORMATS)}',
+        )
+    return await UserImporter(on_conflict).run(read_rows(request.stream(), import_format))
+
+
 @router.put(
     '/{id}',
     dependencies=[SuperUser],
@@ -166,16 +262,13 @@ async def update_user(
     """
     Update a user.
     """
-    user = await User.get(id=id)
-    if user_in.email:
-        user_in.email = user_in.email.lower()
-        existing = await User.get_by_email(email=user_in.email)
-        if existing:
-            raise HTTPException(
-                status_code=HTTPStatus.CONFLICT,
-                detail='The email already exist in the system',
-            )
-    user = await user.update(user, user_in)
+    try:
+        user = await User.update(id, user_in)
+    except IntegrityError as e:
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='The email already exist in the system',
+        ) from e
     return user
 
 
@@ -188,7 +281,9 @@ async def remove_user(id: int):
     """
     Delete a user
     """
-    user = await User.get(id=id)
+    user = await get_user_by_id(id)
+    if user is None:
+        raise DoesNotExist(User)
     await user.delete()
 
 
@@ -202,17 +297,15 @@ async def user_verify_email(user: UserFromEmailToken):
             status_code=HTTPStatus.GONE,
             detail='The user with this email is already verified',
         )
-    user.is_active = True
-    await user.save()
+    async with in_transaction('default'):
+        user.is_active = True
+        await user.save(update_fields=['is_active', 'modified'])
 
-    if settings.emails_enabled and user.email:
-        email_data = emails.generate_welcome_email(first_name=user.first_name)
+        if settings.emails_enabled and user.email:
+            email_data = emails.generate_welcome_email(first_name=user.first_name)
 
-        emails.send_email(
-            email_to=user.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+            await enqueue_email(user.email, email_data)
+    outbox_worker.wake()
 
 
 @router.post('/reset-password', status_code=HTTPStatus.NO_CONTENT)
@@ -222,10 +315,10 @@ async def user_reset_password(body: ResetPassword, user: UserFromEmailToken):
     """
     if user.is_active is False:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail=HTTPStatus.FORBIDDEN.phrase)
-    hashed_password = get_password_hash(password=body.new_password_1)
+    hashed_password = await hash_password(password=body.new_password_1)
     user.password = hashed_password
 
-    await user.save()
+    await user.save(update_fields=['password', 'modified'])
 
 
 @router.post('/verify-delete', status_code=HTTPStatus.NO_CONTENT)
@@ -233,13 +326,11 @@ async def user_verify_delete(user: UserFromEmailToken):
     """
     Deactivate user
     """
-    await user.delete()
+    async with in_transaction('default'):
+        await user.delete()
 
-    if settings.emails_enabled and user.email:
-        email_data = emails.generate_remove_account_success_email(first_name=user.first_name)
+        if settings.emails_enabled and user.email:
+            email_data = emails.generate_remove_account_success_email(first_name=user.first_name)
 
-        emails.send_email(
-            email_to=user.email,
-            subject=email_data.subject,
-            html_content=email_data.html_content,
-        )
+            await enqueue_email(user.email, email_data)
+    outbox_worker.wake()
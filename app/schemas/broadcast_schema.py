@@ -0,0 +1,31 @@
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel
+from sqlmodel import Field
+
+
+class BroadcastCreate(BaseModel):
+    template_name: str = Field(min_length=1, max_length=255)
+    subject: str = Field(min_length=1, max_length=255)
+    context: dict[str, Any] = Field(default_factory=dict)
+    # Recipient filters, None matches any value
+    is_active: bool | None = True
+    is_staff: bool | None = None
+    is_superuser: bool | None = None
+
+    def filters(self) -> dict[str, bool]:
+        return self.model_dump(include={'is_active', 'is_staff', 'is_superuser'}, exclude_none=True)
+
+
+class BroadcastOutput(BaseModel):
+    id: int
+    template_name: str
+    subject: str
+    filters: dict[str, bool]
+    state: str
+    last_user_id: int
+    sent: int
+    failed: int
+    created: datetime
+    finished_at: datetime | None
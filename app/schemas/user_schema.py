@@ -15,10 +15,13 @@ class BaseUserInput(BaseModel):
         return self.model_dump(exclude_unset=True, exclude={'id'})
 
 
-class UserCreate(BaseUserInput):
+class UserBase(BaseUserInput):
     first_name: str = Field(min_length=1, max_length=100)
     last_name: str = Field(min_length=1, max_length=100)
     email: EmailStr = Field(min_length=1, max_length=100)
+
+
+class UserCreate(UserBase):
     password: str = Field(min_length=8, max_length=40)
 
 
@@ -28,6 +31,33 @@ class UserUpdate(BaseUserInput):
     email: EmailStr = Field(default=None, max_length=100)
 
 
+class UserImport(UserBase):
+    # A plain password hashed on import, or an existing hash in one of the supported schemes
+    password: str | None = Field(default=None, min_length=8, max_length=40)
+    password_hash: str | None = Field(default=None, max_length=255)
+
+    @model_validator(mode='after')
+    def check_password(self) -> 'UserImport':
+        if (self.password is None) == (self.password_hash is None):
+            raise ValueError('set either password or password_hash')
+        return self
+
+
+class UserImportError(BaseModel):
+    line: int
+    email: str | None = None
+    errors: list[str]
+
+
+class UserImportResult(BaseModel):
+    received: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    # Only the first USER_IMPORT_MAX_ERRORS failed rows are listed
+    errors: list[UserImportError] = []
+
+
 class UpdatePassword(BaseModel):
     old_password: str = Field(min_length=8, max_length=40)
     new_password_1: str = Field(min_length=8, max_length=40)
@@ -0,0 +1,138 @@
+"""
+Measure end to end email throughput, token creation, rendering and delivery, against an in-process SMTP sink.
+
+Each generate_*_email helper is driven together with send_email at the given concurrency. Pass --save-baseline to
+store the result and --baseline to compare a later run against it, the run exits with status 1 on a regression.
+
+    python -m benchmarks.email_pipeline --messages 500 --concurrency 16 --save-baseline bench_email.json
+    python -m benchmarks.email_pipeline --messages 500 --concurrency 16 --baseline bench_email.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.core import emails
+from app.core.config import settings
+from app.core.jwt_keys import init_jwt_keys
+from app.core.security import create_email_token
+from app.core.smtp_pool import smtp_pool
+from benchmarks.utils import compare
+from benchmarks.utils import summarize
+from tests.utils.smtp import SMTPSink
+
+GENERATORS: dict[str, Callable[[str, str], emails.EmailData]] = {
+    'verification': lambda email, name: emails.generate_verification_email(email_to=email, first_name=name),
+    'reset_password': lambda email, name: emails.generate_reset_password_email(email_to=email, first_name=name),
+    'remove_account': lambda email, name: emails.generate_remove_account_email(email_to=email, first_name=name),
+    'welcome': lambda email, name: emails.generate_welcome_email(first_name=name),
+    'remove_account_success': lambda email, name: emails.generate_remove_account_success_email(first_name=name),
+}
+
+
+def measure_stage(call: Callable[[int], Any], calls: int) -> dict[str, Any]:
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        call(i)
+        samples.append(time.perf_counter() - start)
+    return {'calls_per_second': round(calls / sum(samples), 1), **summarize(samples)}
+
+
+async def measure_pipeline(
+    generate: Callable[[str, str], emails.EmailData], sink: SMTPSink, messages: int, concurrency: int
+) -> dict[str, Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+    generate_samples: list[float] = []
+    deliver_samples: list[float] = []
+    total_samples: list[float] = []
+
+    async def pipeline(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            email = f'user{i}@test.com'
+            email_data = generate(email, 'Benchmark')
+            generated = time.perf_counter()
+            await emails.send_email(email_to=email, subject=email_data.subject, html_content=email_data.html_content)
+            done = time.perf_counter()
+        generate_samples.append(generated - start)
+        deliver_samples.append(done - generated)
+        total_samples.append(done - start)
+
+    received = len(sink.messages)
+    start = time.perf_counter()
+    await asyncio.gather(*(pipeline(i) for i in range(messages)))
+    elapsed = time.perf_counter() - start
+    delivered = len(sink.messages) - received
+    if delivered != messages:
+        raise RuntimeError(f'{messages - delivered} of {messages} emails were not delivered')
+    return {
+        'messages_per_second': round(messages / elapsed, 1),
+        'generate': summarize(generate_samples),
+        'deliver': summarize(deliver_samples),
+        'total': summarize(total_samples),
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    logging.getLogger('mail.log').setLevel(logging.WARNING)
+    logging.getLogger('app.core.emails').setLevel(logging.WARNING)
+    init_jwt_keys()
+    emails.email_templates.load()
+
+    result: dict[str, Any] = {
+        'config': {'messages': args.messages, 'concurrency': args.concurrency, 'pool_size': smtp_pool.max_size},
+        'stages': {
+            'create_email_token': measure_stage(lambda i: create_email_token(f'user{i}@test.com'), args.messages),
+            'render_email_template': measure_stage(
+                lambda i: emails.render_email_template(
+                    template_name='email_verification.html',
+                    context={'name': 'Benchmark', 'verify_email_url': f'http://localhost/{i}', 'expiration_hours': 72},
+                ),
+                args.messages,
+            ),
+        },
+        'pipelines': {},
+    }
+    async with SMTPSink() as sink:
+        settings.SMTP_HOST = 'localhost'
+        settings.SMTP_PORT = sink.port
+        settings.SMTP_TLS = settings.SMTP_SSL = False
+        settings.SMTP_USER = settings.SMTP_PASSWORD = None
+        for name in args.generators:
+            result['pipelines'][name] = await measure_pipeline(GENERATORS[name], sink, args.messages, args.concurrency)
+
+    status = 0
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        baseline.pop('comparison', None)
+        if baseline.get('config') != result['config']:
+            print('warning: baseline was recorded with a different config', file=sys.stderr)
+        result['comparison'] = compare(result, baseline, args.tolerance)
+        regressions = [name for name, metric in result['comparison'].items() if metric['regressed']]
+        if regressions:
+            print(f'regressed: {", ".join(regressions)}', file=sys.stderr)
+            status = 1
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(
+            json.dumps({k: v for k, v in result.items() if k != 'comparison'}, indent=2)
+        )
+    print(json.dumps(result, indent=2))
+    return status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--baseline', help='result JSON to compare against')
+    parser.add_argument('--save-baseline', help='write the result JSON to this path')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='allowed regression as a fraction')
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,50 @@
+"""
+Compare email renders per second with a per call file read and compile against the compiled template registry.
+
+    python -m benchmarks.email_templates --renders 5000
+"""
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Template
+
+from app.core.emails import email_templates
+
+TEMPLATE_NAME = 'email_verification.html'
+CONTEXT = {'name': 'Benchmark', 'verify_email_url': 'http://localhost/verify', 'expiration_hours': 72}
+
+
+def render_uncompiled(template_name: str, context: dict[str, Any]) -> str:
+    template_str = (Path('app') / 'email-templates' / 'build' / template_name).read_text()
+    return Template(template_str).render(context)
+
+
+def renders_per_second(render: Callable[[str, dict[str, Any]], str], renders: int) -> float:
+    start = time.perf_counter()
+    for _ in range(renders):
+        render(TEMPLATE_NAME, CONTEXT)
+    return renders / (time.perf_counter() - start)
+
+
+def main(args: argparse.Namespace) -> None:
+    email_templates.load()
+    before = renders_per_second(render_uncompiled, args.renders)
+    after = renders_per_second(email_templates.render, args.renders)
+    result = {
+        'template': TEMPLATE_NAME,
+        'uncompiled_renders_per_second': round(before, 1),
+        'registry_renders_per_second': round(after, 1),
+        'speedup': round(after / before, 1),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--renders', type=int, default=5000)
+    main(parser.parse_args())
@@ -0,0 +1,74 @@
+"""
+Measure latency of a cheap endpoint while a storm of logins runs against the same server.
+
+    fastapi run --workers 1 &
+    python -m benchmarks.login_storm --email admin@example.com --password changethis
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.utils import summarize
+
+
+async def login_storm(
+    client: httpx.AsyncClient, email: str, password: str, logins: int, concurrency: int
+) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[float] = []
+
+    async def login() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await client.post('/login', data={'username': email, 'password': password})
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return samples
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, interval: float) -> list[float]:
+    samples: list[float] = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get('/health-check')
+        samples.append(time.perf_counter() - start)
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def main(args: argparse.Namespace) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        baseline_stop = asyncio.Event()
+        baseline = asyncio.create_task(probe(client, baseline_stop, args.interval))
+        await asyncio.sleep(args.baseline_seconds)
+        baseline_stop.set()
+
+        storm_stop = asyncio.Event()
+        during = asyncio.create_task(probe(client, storm_stop, args.interval))
+        logins = await login_storm(client, args.email, args.password, args.logins, args.concurrency)
+        storm_stop.set()
+
+        result = {
+            'health_check_idle': summarize(await baseline),
+            'health_check_during_storm': summarize(await during),
+            'login': summarize(logins),
+        }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000/api/v1')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.01)
+    parser.add_argument('--baseline-seconds', type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
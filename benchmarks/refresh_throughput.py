@@ -0,0 +1,49 @@
+"""
+Measure refresh token rotation throughput, each session logs in once and then keeps rotating its refresh token.
+
+    fastapi run --workers 1 &
+    python -m benchmarks.refresh_throughput --email admin@example.com --password changethis
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from benchmarks.utils import summarize
+
+
+async def session(client: httpx.AsyncClient, args: argparse.Namespace, samples: list[float]) -> None:
+    r = await client.post('/login', data={'username': args.email, 'password': args.password})
+    r.raise_for_status()
+    refresh_token = r.cookies['refresh_token']
+    for _ in range(args.refreshes):
+        start = time.perf_counter()
+        r = await client.post('/login/refresh', headers={'Cookie': f'refresh_token={refresh_token}'})
+        samples.append(time.perf_counter() - start)
+        r.raise_for_status()
+        refresh_token = r.cookies['refresh_token']
+
+
+async def main(args: argparse.Namespace) -> None:
+    samples: list[float] = []
+    limits = httpx.Limits(max_connections=args.sessions)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(session(client, args, samples) for _ in range(args.sessions)))
+        elapsed = time.perf_counter() - start
+
+    result = {'refreshes_per_second': round(len(samples) / elapsed, 1), 'refresh': summarize(samples)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000/api/v1')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--sessions', type=int, default=10)
+    parser.add_argument('--refreshes', type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+"""
+Measure SMTP delivery throughput against an in-process SMTP sink, with a connection per message and with the pool.
+
+    python -m benchmarks.smtp_throughput --counts 1 10 1000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.core.emails import build_message
+from app.core.smtp_pool import SMTPConnectionPool
+from tests.utils.smtp import SMTPSink
+
+
+async def measure(pool: SMTPConnectionPool, count: int) -> dict[str, float]:
+    messages = [build_message(email_to=f'user{i}@test.com', subject='Benchmark') for i in range(count)]
+    start = time.perf_counter()
+    results = await pool.send_many(messages)
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures:
+        raise failures[0]
+    return {
+        'seconds': round(elapsed, 4),
+        'messages_per_second': round(count / elapsed, 1),
+        'connections': pool.connects,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger('mail.log').setLevel(logging.WARNING)
+    result: dict[str, dict[str, dict[str, float]]] = {}
+    async with SMTPSink() as sink:
+        settings.SMTP_HOST = 'localhost'
+        settings.SMTP_PORT = sink.port
+        settings.SMTP_TLS = settings.SMTP_SSL = False
+        settings.SMTP_USER = settings.SMTP_PASSWORD = None
+        for count in args.counts:
+            per_message = SMTPConnectionPool(
+                max_size=args.pool_size, idle_timeout=60, max_messages=1, health_check_after=5
+            )
+            pooled = SMTPConnectionPool(
+                max_size=args.pool_size, idle_timeout=60, max_messages=args.max_messages, health_check_after=5
+            )
+            result[str(count)] = {
+                'connection_per_message': await measure(per_message, count),
+                'pooled': await measure(pooled, count),
+            }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--counts', type=int, nargs='+', default=[1, 10, 1000])
+    parser.add_argument('--pool-size', type=int, default=settings.SMTP_POOL_SIZE)
+    parser.add_argument('--max-messages', type=int, default=settings.SMTP_POOL_MAX_MESSAGES)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Measure seconds from launching the server to its first healthy /health-check, and the first requests after it.
+
+Each run starts `fastapi run` against the database in .env, compare DB_SCHEMA_MODE=generate and DB_SCHEMA_MODE=check
+with migrations applied by `aerich upgrade`.
+
+    python -m benchmarks.startup --workers 4 --runs 5
+    DB_SCHEMA_MODE=generate python -m benchmarks.startup --workers 4 --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.core.config import settings
+from benchmarks.utils import summarize
+
+
+async def wait_healthy(client: httpx.AsyncClient, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with {process.returncode} before becoming healthy')
+        try:
+            if (await client.get(f'{settings.API_V1_STR}/health-check')).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.01)
+    raise TimeoutError(f'server not healthy after {timeout}s')
+
+
+async def run(args: argparse.Namespace) -> dict[str, float]:
+    command = [sys.executable, '-m', 'fastapi', 'run', '--workers', str(args.workers), '--port', str(args.port)]
+    start = time.perf_counter()
+    process = subprocess.Popen(  # noqa: S603
+        [*command, 'app/main.py'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f'http://127.0.0.1:{args.port}', timeout=10) as client:
+            await wait_healthy(client, process, args.timeout)
+            healthy = time.perf_counter() - start
+
+            # First requests that need a database connection and the OpenAPI document
+            request_start = time.perf_counter()
+            await client.post(f'{settings.API_V1_STR}/login', data={'username': 'bench@example.com', 'password': 'x'})
+            first_query = time.perf_counter() - request_start
+            request_start = time.perf_counter()
+            await client.get(f'{settings.API_V1_STR}/openapi.json')
+            first_openapi = time.perf_counter() - request_start
+    finally:
+        stop_start = time.perf_counter()
+        process.terminate()
+        process.wait()
+        shutdown = time.perf_counter() - stop_start
+    return {
+        'healthy': healthy,
+        'first_query': first_query,
+        'first_openapi': first_openapi,
+        'shutdown': shutdown,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    samples = [await run(args) for _ in range(args.runs)]
+    result = {
+        'workers': args.workers,
+        'db_schema_mode': settings.db_schema_mode,
+        **{name: summarize([sample[name] for sample in samples]) for name in samples[0]},
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--port', type=int, default=8123)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,62 @@
+import statistics
+from typing import Any
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: list[float]) -> dict[str, Any]:
+    """
+    Latency summary in milliseconds for a list of samples in seconds
+    """
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3) if samples else 0.0,
+    }
+
+
+def flatten(result: dict[str, Any], prefix: str = '') -> dict[str, float]:
+    flat: dict[str, float] = {}
+    for key, value in result.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{name}.'))
+        elif isinstance(value, int | float) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> dict[str, Any]:
+    """
+    Compare `*_per_second` (higher is better) and `*_ms` (lower is better) metrics against a baseline result,
+    flagging changes worse than `tolerance` as a fraction
+    """
+    current_flat = flatten(current)
+    comparison: dict[str, Any] = {}
+    for name, before in flatten(baseline).items():
+        if name not in current_flat or not before:
+            continue
+        if name.endswith('_per_second'):
+            higher_is_better = True
+        elif name.endswith('_ms') and not name.endswith('max_ms'):
+            higher_is_better = False
+        else:
+            continue
+        after = current_flat[name]
+        change = (after - before) / before
+        comparison[name] = {
+            'baseline': before,
+            'current': after,
+            'change_pct': round(change * 100, 1),
+            'regressed': change < -tolerance if higher_is_better else change > tolerance,
+        }
+    return comparison
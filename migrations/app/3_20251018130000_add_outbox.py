@@ -0,0 +1,25 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "outbox" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "created" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "modified" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "email_to" VARCHAR(100) NOT NULL,
+    "subject" VARCHAR(255) NOT NULL,
+    "html_content" TEXT NOT NULL,
+    "state" VARCHAR(16) NOT NULL  DEFAULT 'pending',
+    "attempts" INT NOT NULL  DEFAULT 0,
+    "available_at" TIMESTAMPTZ NOT NULL,
+    "last_error" TEXT,
+    "sent_at" TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS "idx_outbox_state_5b9c3e" ON "outbox" ("state", "available_at");
+COMMENT ON COLUMN "outbox"."state" IS 'PENDING: pending\\nSENT: sent\\nDEAD: dead';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "outbox";"""
@@ -0,0 +1,27 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS "broadcast" (
+    "id" BIGSERIAL NOT NULL PRIMARY KEY,
+    "created" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "modified" TIMESTAMPTZ NOT NULL  DEFAULT CURRENT_TIMESTAMP,
+    "created_by" BIGINT NOT NULL,
+    "template_name" VARCHAR(255) NOT NULL,
+    "subject" VARCHAR(255) NOT NULL,
+    "context" JSONB NOT NULL,
+    "filters" JSONB NOT NULL,
+    "state" VARCHAR(16) NOT NULL  DEFAULT 'running',
+    "last_user_id" BIGINT NOT NULL  DEFAULT 0,
+    "sent" INT NOT NULL  DEFAULT 0,
+    "failed" INT NOT NULL  DEFAULT 0,
+    "lease_until" TIMESTAMPTZ,
+    "finished_at" TIMESTAMPTZ
+);
+COMMENT ON COLUMN "broadcast"."state" IS 'RUNNING: running\\nDONE: done';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "broadcast";"""
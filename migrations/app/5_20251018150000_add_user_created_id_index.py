@@ -0,0 +1,15 @@
+from tortoise import BaseDBAsyncClient
+
+
+# CREATE INDEX blocks writes to "user" while it builds. On a large table build the index first, outside a
+# transaction, and this migration only records it. Drop the index and retry if the build fails, IF NOT EXISTS would
+# skip an invalid one:
+#   CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_user_created_id" ON "user" ("created" DESC, "id");
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_user_created_id" ON "user" ("created" DESC, "id");"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_user_created_id";"""
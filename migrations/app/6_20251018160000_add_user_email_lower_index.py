@@ -0,0 +1,13 @@
+from tortoise import BaseDBAsyncClient
+
+
+# Blocks writes to "user" while it builds, see migration 5 for building it out-of-band on a large table:
+#   CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_user_email_lower" ON "user" (LOWER("email"));
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE INDEX IF NOT EXISTS "idx_user_email_lower" ON "user" (LOWER("email"));"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_user_email_lower";"""
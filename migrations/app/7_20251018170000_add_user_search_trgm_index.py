@@ -0,0 +1,18 @@
+from tortoise import BaseDBAsyncClient
+
+
+# Blocks writes to "user" while it builds, the GIN build is the slowest of the user indexes. See migration 5 for
+# building it out-of-band on a large table:
+#   CREATE EXTENSION IF NOT EXISTS pg_trgm;
+#   CREATE INDEX CONCURRENTLY IF NOT EXISTS "idx_user_search_trgm" ON "user"
+#       USING GIN ((LOWER("email") || ' ' || LOWER("first_name") || ' ' || LOWER("last_name")) gin_trgm_ops);
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS "idx_user_search_trgm" ON "user"
+            USING GIN ((LOWER("email") || ' ' || LOWER("first_name") || ' ' || LOWER("last_name")) gin_trgm_ops);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_user_search_trgm";"""
@@ -0,0 +1,12 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "outbox" ALTER COLUMN "html_content" DROP NOT NULL;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        UPDATE "outbox" SET "html_content" = '' WHERE "html_content" IS NULL;
+        ALTER TABLE "outbox" ALTER COLUMN "html_content" SET NOT NULL;"""
@@ -2,6 +2,7 @@ from http import HTTPStatus
 
 from httpx import AsyncClient
 
+from app.core import security
 from app.core.config import settings
 from app.core.security import create_access_token
 from app.core.security import create_email_token
@@ -75,3 +76,59 @@ async def test_refresh_wrong_payload1(client: AsyncClient) -> None:
 async def test_logout(client: AsyncClient) -> None:
     r = await client.post(f'{settings.API_V1_STR}/logout')
     assert r.status_code == HTTPStatus.OK
+
+
+async def test_login_access_token_hasher_busy(client: AsyncClient, normal_user: User, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_QUEUE_DEPTH', 0)
+    login = {'username': normal_user.email, 'password': 'mockpassword'}
+    r = await client.post(f'{settings.API_V1_STR}/login', data=login)
+    assert r.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+async def test_login_access_token_rehash(client: AsyncClient, monkeypatch) -> None:
+    user = await user_mock()
+    user.password = security.pwd_context.handler().using(rounds=1000).hash('mockpassword')
+    await user.save()
+    monkeypatch.setattr(security, 'pwd_context', security.build_password_context('django_pbkdf2_sha256', 2000))
+
+    login = {'username': user.email, 'password': 'mockpassword'}
+    r = await client.post(f'{settings.API_V1_STR}/login', data=login)
+    assert r.status_code == HTTPStatus.OK
+
+    updated = await User.get(id=user.id)
+    assert updated.password.startswith('pbkdf2_sha256$2000$')
+    assert await security.verify_password('mockpassword', updated.password)
+
+
+async def test_refresh_rotation(client: AsyncClient) -> None:
+    user = await user_mock()
+    refresh_token = create_refresh_token(user.id)
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': refresh_token})
+    assert r.status_code == HTTPStatus.OK
+    rotated = r.cookies['refresh_token']
+    assert rotated != refresh_token
+
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': rotated})
+    assert r.status_code == HTTPStatus.OK
+
+
+async def test_refresh_reuse_revokes_family(client: AsyncClient) -> None:
+    user = await user_mock()
+    refresh_token = create_refresh_token(user.id)
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': refresh_token})
+    rotated = r.cookies['refresh_token']
+
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': refresh_token})
+    assert r.status_code == HTTPStatus.UNAUTHORIZED
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': rotated})
+    assert r.status_code == HTTPStatus.UNAUTHORIZED
+
+
+async def test_logout_revokes_refresh_token(client: AsyncClient) -> None:
+    user = await user_mock()
+    refresh_token = create_refresh_token(user.id)
+    r = await client.post(f'{settings.API_V1_STR}/logout', cookies={'refresh_token': refresh_token})
+    assert r.status_code == HTTPStatus.OK
+
+    r = await client.post(f'{settings.API_V1_STR}/login/refresh', cookies={'refresh_token': refresh_token})
+    assert r.status_code == HTTPStatus.UNAUTHORIZED
@@ -4,11 +4,15 @@ from unittest.mock import patch
 from httpx import AsyncClient
 
 from app.core.config import settings
+from app.core.pagination import _b64encode
+from app.core.pagination import _sign
 from app.core.security import create_access_token
 from app.core.security import create_email_token
 from app.core.security import create_refresh_token
 from app.core.security import verify_password
 from app.models.user import User
+from app.schemas.user_schema import UserOutput
+from tests.utils.queries import capture_queries
 from tests.utils.utils import inactive_user_mock
 from tests.utils.utils import random_email
 from tests.utils.utils import random_lower_string
@@ -47,6 +51,22 @@ async def test_register_user_existing(client: AsyncClient) -> None:
     assert r.json()['detail'] == 'The user with this email already exists in the system'
 
 
+async def test_register_user_single_statement(client: AsyncClient) -> None:
+    data = {
+        'email': random_email(),
+        'password': random_lower_string(),
+        'first_name': random_lower_string(),
+        'last_name': random_lower_string(),
+    }
+    with capture_queries() as log:
+        r = await client.post(f'{BASE_URL}/register', json=data)
+    assert r.status_code == HTTPStatus.CREATED
+
+    statements = log.statements('user')
+    assert len(statements) == 1
+    assert statements[0][0].startswith('INSERT')
+
+
 async def test_create_user(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
     with (
         patch('app.core.emails.send_email', return_value=None),
@@ -90,6 +110,36 @@ async def test_create_user_forbidden(client: AsyncClient, normaluser_token_heade
     assert r.status_code == HTTPStatus.FORBIDDEN
 
 
+async def test_import_users(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    emails = [random_email(), random_email()]
+    body = 'email,first_name,last_name,password\n' + ''.join(f'{email},First,Last,mockpassword\n' for email in emails)
+    r = await client.post(
+        f'{BASE_URL}/import',
+        headers={**superuser_token_headers, 'Content-Type': 'text/csv'},
+        content=body + 'invalid,First,Last,mockpassword\n',
+    )
+    assert r.status_code == HTTPStatus.OK
+    result = r.json()
+    assert (result['received'], result['created'], result['failed']) == (3, 2, 1)
+    assert result['errors'][0]['line'] == 4
+    for email in emails:
+        assert await User.get_by_email(email)
+
+
+async def test_import_users_unsupported_format(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    r = await client.post(f'{BASE_URL}/import', headers=superuser_token_headers, json=[])
+    assert r.status_code == HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+
+
+async def test_import_users_forbidden(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
+    r = await client.post(
+        f'{BASE_URL}/import',
+        headers={**normaluser_token_headers, 'Content-Type': 'application/x-ndjson'},
+        content=b'',
+    )
+    assert r.status_code == HTTPStatus.FORBIDDEN
+
+
 async def test_get_user(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
     user = await user_mock()
 
@@ -104,6 +154,56 @@ async def test_get_user(client: AsyncClient, superuser_token_headers: dict[str,
     assert user.email == api_user['email']
 
 
+async def test_get_user_fields(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    user = await user_mock()
+    with capture_queries() as log:
+        r = await client.get(f'{BASE_URL}/{user.id}', headers=superuser_token_headers, params={'fields': 'email,id'})
+    assert r.status_code == HTTPStatus.OK
+    assert r.json() == {'email': user.email, 'id': user.id}
+
+    query, _ = log.statements('user')[-1]
+    assert '"password"' not in query
+    assert '"first_name"' not in query
+
+
+async def test_get_user_unknown_fields(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    user = await user_mock()
+    r = await client.get(f'{BASE_URL}/{user.id}', headers=superuser_token_headers, params={'fields': 'id,password'})
+    assert r.status_code == HTTPStatus.BAD_REQUEST
+    assert r.json()['detail'] == 'Unknown fields: password'
+
+
+async def test_search_users(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    user = await user_mock()
+    other = await user_mock()
+
+    r = await client.get(f'{BASE_URL}/search', headers=superuser_token_headers, params={'q': user.last_name[2:9]})
+    assert r.status_code == HTTPStatus.OK
+    assert [found['id'] for found in r.json()] == [user.id]
+    assert set(r.json()[0]) == set(UserOutput.model_fields)
+
+    r = await client.get(f'{BASE_URL}/search', headers=superuser_token_headers, params={'q': other.email.upper()})
+    assert [found['id'] for found in r.json()] == [other.id]
+
+
+async def test_search_users_wildcards(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    await user_mock()
+    for q in ('%%%', '___', '   '):
+        r = await client.get(f'{BASE_URL}/search', headers=superuser_token_headers, params={'q': q})
+        assert r.status_code == HTTPStatus.OK
+        assert r.json() == []
+
+
+async def test_search_users_short_query(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    r = await client.get(f'{BASE_URL}/search', headers=superuser_token_headers, params={'q': 'ab'})
+    assert r.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+async def test_search_users_forbidden(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
+    r = await client.get(f'{BASE_URL}/search', headers=normaluser_token_headers, params={'q': 'user'})
+    assert r.status_code == HTTPStatus.FORBIDDEN
+
+
 async def test_get_user_nonexisting(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
     r = await client.get(
         f'{BASE_URL}/000',
@@ -143,10 +243,9 @@ async def test_get_all_user(client: AsyncClient, superuser_token_headers: dict[s
 
     assert r.status_code == HTTPStatus.OK
     assert len(all_users['items']) > 1
-    assert 'total' in all_users
-    assert 'page' in all_users
-    assert 'size' in all_users
-    assert 'pages' in all_users
+    assert all_users['total'] is None
+    assert all_users['size'] == 50
+    assert 'next_cursor' in all_users
 
     for user in all_users['items']:
         assert 'email' in user
@@ -157,6 +256,78 @@ async def test_get_all_user(client: AsyncClient, superuser_token_headers: dict[s
         assert 'is_superuser' in user
 
 
+async def test_get_all_user_cursor_pages(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    for _ in range(3):
+        await user_mock()
+    r = await client.get(BASE_URL, headers=superuser_token_headers, params={'size': 100, 'include_total': True})
+    everyone = [user['id'] for user in r.json()['items']]
+    total = r.json()['total']
+    assert total == await User.all().count()
+
+    seen = []
+    params = {'size': 2}
+    while True:
+        r = await client.get(BASE_URL, headers=superuser_token_headers, params=params)
+        assert r.status_code == HTTPStatus.OK
+        seen.extend(user['id'] for user in r.json()['items'])
+        if r.json()['next_cursor'] is None:
+            break
+        params['cursor'] = r.json()['next_cursor']
+    assert seen[: len(everyone)] == everyone
+    assert len(set(seen)) == len(seen) == total
+
+
+async def test_get_all_user_fields(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    await user_mock()
+    await user_mock()
+    params = {'size': 1, 'fields': 'email'}
+    with capture_queries() as log:
+        r = await client.get(BASE_URL, headers=superuser_token_headers, params=params)
+    assert r.status_code == HTTPStatus.OK
+    page = r.json()
+    assert list(page['items'][0]) == ['email']
+    assert '"password"' not in log.statements('user')[-1][0]
+
+    r = await client.get(BASE_URL, headers=superuser_token_headers, params={**params, 'cursor': page['next_cursor']})
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()['items'][0]['email'] != page['items'][0]['email']
+
+
+async def test_get_all_user_invalid_cursor(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    r = await client.get(BASE_URL, headers=superuser_token_headers, params={'size': 1})
+    cursor = r.json()['next_cursor']
+    payload, signature = cursor.split('.')
+
+    for bad in ('nope', f'{payload}.{signature[::-1]}', f'{payload[::-1]}.{signature}'):
+        r = await client.get(BASE_URL, headers=superuser_token_headers, params={'cursor': bad})
+        assert r.status_code == HTTPStatus.BAD_REQUEST
+
+    # Signed but malformed payloads
+    for data in (b'1', b'null', b'[1,2]', b'[1,2,3]', b'["2025-01-01T00:00:00",null]', b'{'):
+        bad = f'{_b64encode(data)}.{_b64encode(_sign("users", data))}'
+        r = await client.get(BASE_URL, headers=superuser_token_headers, params={'cursor': bad})
+        assert r.status_code == HTTPStatus.BAD_REQUEST
+
+
+async def test_export_users(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    user = await user_mock()
+    r = await client.get(f'{BASE_URL}/export', headers=superuser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+    assert r.headers['content-type'] == 'application/x-ndjson'
+    assert user.email in r.text
+    assert user.password not in r.text
+
+    r = await client.get(f'{BASE_URL}/export', headers=superuser_token_headers, params={'format': 'csv'})
+    assert r.status_code == HTTPStatus.OK
+    assert r.headers['content-disposition'] == 'attachment; filename="users.csv"'
+    assert r.text.startswith('id,email,')
+
+
+async def test_export_users_forbidden(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
+    r = await client.get(f'{BASE_URL}/export', headers=normaluser_token_headers)
+    assert r.status_code == HTTPStatus.FORBIDDEN
+
+
 async def test_get_all_user_forbidden(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
     r = await client.get(BASE_URL, headers=normaluser_token_headers)
     assert r.status_code == HTTPStatus.FORBIDDEN
@@ -191,9 +362,10 @@ async def test_update_user_nonexisting(client: AsyncClient, superuser_token_head
 
 async def test_update_user_email_exists(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
     user = await user_mock()
+    other = await user_mock()
 
     data = {
-        'email': user.email,
+        'email': other.email,
         'first_name': random_lower_string(),
         'last_name': random_lower_string(),
     }
@@ -205,6 +377,27 @@ async def test_update_user_email_exists(client: AsyncClient, superuser_token_hea
     assert r.status_code == HTTPStatus.CONFLICT
     assert r.json()['detail'] == 'The email already exist in the system'
 
+    unchanged = await User.get(id=user.id)
+    assert unchanged.email == user.email
+    assert unchanged.first_name == user.first_name
+
+
+async def test_update_user_single_statement(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    user = await user_mock()
+
+    data = {'last_name': random_lower_string()}
+    with capture_queries() as log:
+        r = await client.put(f'{BASE_URL}/{user.id}', headers=superuser_token_headers, json=data)
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()['last_name'] == data['last_name']
+    assert r.json()['email'] == user.email
+
+    # The superuser lookup and one UPDATE ... RETURNING that only sets the sent field
+    (update,) = log.statements('user', kinds=('UPDATE',))
+    assert len(log.statements('user')) == 2
+    assert 'RETURNING' in update[0]
+    assert '"first_name"' not in update[0].split('WHERE')[0]
+
 
 async def test_update_user_forbidden(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
     user = await user_mock()
@@ -291,7 +484,7 @@ async def test_user_reset_password(client: AsyncClient) -> None:
     assert r.status_code == HTTPStatus.NO_CONTENT
 
     updated = await User.get(id=user.id)
-    assert verify_password('changethis', updated.password)
+    assert await verify_password('changethis', updated.password)
     assert user.first_name == updated.first_name
     assert user.last_name == updated.last_name
 
@@ -8,8 +8,10 @@ from app.core.security import create_email_token
 from app.core.security import create_refresh_token
 from app.core.security import verify_password
 from app.models.user import User
+from tests.utils.queries import capture_queries
 from tests.utils.utils import inactive_user_mock
 from tests.utils.utils import random_lower_string
+from tests.utils.utils import user_mock
 
 BASE_URL = f'{settings.API_V1_STR}/users/current'
 
@@ -22,6 +24,14 @@ async def test_get_current_user(
     assert r.json()['email'] == normal_user.email
 
 
+async def test_get_current_user_fields(
+    client: AsyncClient, normal_user: User, normaluser_token_headers: dict[str, str]
+) -> None:
+    r = await client.get(BASE_URL, headers=normaluser_token_headers, params={'fields': 'first_name'})
+    assert r.status_code == HTTPStatus.OK
+    assert r.json() == {'first_name': normal_user.first_name}
+
+
 async def test_get_current_user_no_token(client: AsyncClient) -> None:
     r = await client.get(BASE_URL)
     assert r.status_code == HTTPStatus.UNAUTHORIZED
@@ -75,7 +85,7 @@ async def test_update_current_user_password_same(
     assert r.json()['detail'][0]['msg'] == 'Value error, new password should not be the same current'
 
     updated = await User.get(id=normal_user.id)
-    assert verify_password('mockpassword', updated.password)
+    assert await verify_password('mockpassword', updated.password)
     assert normal_user.first_name == updated.first_name
     assert normal_user.last_name == updated.last_name
 
@@ -150,6 +160,34 @@ async def test_update_current_user(
     assert updated.last_name == data['last_name']
 
 
+async def test_update_current_user_email_exists(client: AsyncClient) -> None:
+    user = await user_mock()
+    other = await user_mock()
+    headers = {'Authorization': f'Bearer {create_access_token(user.id)}'}
+
+    r = await client.put(BASE_URL, headers=headers, json={'email': other.email.upper()})
+    assert r.status_code == HTTPStatus.CONFLICT
+    assert (await User.get(id=user.id)).email == user.email
+
+
+async def test_update_current_user_cached(client: AsyncClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'USER_CACHE_ENABLED', True)
+    user = await user_mock()
+    headers = {'Authorization': f'Bearer {create_access_token(user.id)}'}
+    r = await client.get(BASE_URL, headers=headers)
+    assert r.status_code == HTTPStatus.OK
+
+    # The user comes from the cache, so the update is the only statement
+    with capture_queries() as log:
+        r = await client.put(BASE_URL, headers=headers, json={'first_name': 'Cached'})
+    assert r.status_code == HTTPStatus.OK
+    assert [query.split()[0] for query, _ in log.statements('user')] == ['UPDATE']
+
+    # The queryset update does not send post_save, the route drops the cached row itself
+    r = await client.get(BASE_URL, headers=headers)
+    assert r.json()['first_name'] == 'Cached'
+
+
 async def test_remove_current_user(
     client: AsyncClient, normal_user: User, normaluser_token_headers: dict[str, str]
 ) -> None:
@@ -161,3 +199,16 @@ async def test_remove_current_user(
 
     updated = await User.get_by_email(email=normal_user.email)
     assert updated is not None
+
+
+async def test_get_current_user_cached_invalidated(client: AsyncClient, monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'USER_CACHE_ENABLED', True)
+    user = await user_mock()
+    headers = {'Authorization': f'Bearer {create_access_token(user.id)}'}
+    r = await client.get(BASE_URL, headers=headers)
+    assert r.status_code == HTTPStatus.OK
+
+    user.is_active = False
+    await user.save()
+    r = await client.get(BASE_URL, headers=headers)
+    assert r.status_code == HTTPStatus.UNAUTHORIZED
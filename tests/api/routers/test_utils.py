@@ -2,7 +2,12 @@ from http import HTTPStatus
 
 from httpx import AsyncClient
 
+from app.core import rate_limit
 from app.core.config import settings
+from app.core.outbox import outbox_worker
+from app.models.outbox import Outbox
+from app.models.outbox import OutboxState
+from tests.utils.smtp import SMTPSink
 from tests.utils.utils import inactive_user_mock
 from tests.utils.utils import random_email
 from tests.utils.utils import user_mock
@@ -48,3 +53,35 @@ async def test_utils_password_recovery_not_found(client: AsyncClient) -> None:
     r = await client.post(f'{settings.API_V1_STR}/password-recovery', json={'email': random_email()})
     assert r.status_code == HTTPStatus.NOT_FOUND
     assert HTTPStatus.NOT_FOUND.phrase == r.json()['detail']
+
+
+async def test_utils_password_recovery_rate_limited(
+    client: AsyncClient, monkeypatch, rate_limiter: rate_limit.RateLimiter
+) -> None:
+    monkeypatch.setattr(settings, 'RATE_LIMIT_PASSWORD_RECOVERY', '1/hour')
+    user = await user_mock()
+
+    r = await client.post(f'{settings.API_V1_STR}/password-recovery', json={'email': user.email})
+    assert r.status_code == HTTPStatus.OK
+    r = await client.post(f'{settings.API_V1_STR}/password-recovery', json={'email': user.email})
+    assert r.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(r.headers['Retry-After']) > 0
+    assert rate_limiter.rejected['password_recovery'] == 1
+
+
+async def test_jwks(client: AsyncClient) -> None:
+    r = await client.get('/.well-known/jwks.json')
+    assert r.status_code == HTTPStatus.OK
+    assert r.json() == {'keys': []}
+    assert r.headers['Cache-Control'] == f'public, max-age={settings.JWKS_MAX_AGE_SECONDS}'
+
+
+async def test_utils_password_recovery_sends_email(client: AsyncClient, smtp_sink: SMTPSink) -> None:
+    user = await inactive_user_mock()
+    r = await client.post(f'{settings.API_V1_STR}/password-recovery', json={'email': user.email})
+    assert await Outbox.filter(email_to=user.email, state=OutboxState.PENDING).count() == 1
+    await outbox_worker.run_once()
+
+    assert r.status_code == HTTPStatus.OK
+    assert user.email in [message['To'] for message in smtp_sink.messages]
+    assert await Outbox.filter(email_to=user.email, state=OutboxState.SENT).count() == 1
@@ -3,10 +3,12 @@ from httpx import ASGITransport
 from httpx import AsyncClient
 from tortoise import Tortoise
 
+from app.core import rate_limit
 from app.core.config import settings
 from app.main import app
 from app.models.user import User
 from app.schemas.user_schema import UserDB
+from tests.utils.smtp import SMTPSink
 from tests.utils.utils import random_email
 from tests.utils.utils import random_lower_string
 
@@ -15,7 +17,19 @@ DB_URL = 'sqlite://:memory:'
 
 async def init_db(db_url, create_db: bool = False, schemas: bool = False) -> None:
     """Initial database connection"""
-    await Tortoise.init(db_url=db_url, modules={'models': ['app.models.user']}, _create_db=create_db)
+    await Tortoise.init(
+        db_url=db_url,
+        modules={
+            'models': [
+                'aerich.models',
+                'app.models.broadcast',
+                'app.models.outbox',
+                'app.models.token',
+                'app.models.user',
+            ]
+        },
+        _create_db=create_db,
+    )
     if create_db:
         print(f'Database created! {db_url = }')
     if schemas:
@@ -45,6 +59,14 @@ async def initialize_tests():
     await Tortoise._drop_databases()
 
 
+@pytest.fixture(autouse=True)
+def rate_limiter(monkeypatch):
+    """Fresh rate limit state per test, so requests from earlier tests never count against later ones"""
+    limiter = rate_limit.RateLimiter(rate_limit.InMemoryRateLimitBackend())
+    monkeypatch.setattr(rate_limit, 'limiter', limiter)
+    return limiter
+
+
 @pytest.fixture(scope='session')
 async def normal_user():
     user_in = UserDB(
@@ -89,3 +111,24 @@ async def normaluser_token_headers(client: AsyncClient, normal_user: User):
 
     token = r.json()['access_token']
     return {'Authorization': f'Bearer {token}'}
+
+
+def use_smtp(monkeypatch, port: int) -> None:
+    monkeypatch.setattr(settings, 'SMTP_HOST', 'localhost')
+    monkeypatch.setattr(settings, 'SMTP_PORT', port)
+    monkeypatch.setattr(settings, 'SMTP_TLS', False)
+    monkeypatch.setattr(settings, 'SMTP_SSL', False)
+
+
+@pytest.fixture
+async def smtp_sink(monkeypatch):
+    """SMTP server on localhost collecting sent messages, used by email sending"""
+    async with SMTPSink() as sink:
+        use_smtp(monkeypatch, sink.port)
+        yield sink
+
+
+@pytest.fixture
+def unreachable_smtp(monkeypatch):
+    """Point email sending at a closed port"""
+    use_smtp(monkeypatch, 1)
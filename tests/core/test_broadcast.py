@@ -0,0 +1,161 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.broadcast import broadcaster
+from app.core.broadcast import Broadcaster
+from app.core.config import settings
+from app.models.broadcast import Broadcast
+from app.models.broadcast import BroadcastState
+from app.models.outbox import Outbox
+from app.models.user import User
+from app.schemas.broadcast_schema import BroadcastCreate
+from tests.utils.smtp import SMTPSink
+from tests.utils.utils import inactive_user_mock
+from tests.utils.utils import user_mock
+
+
+@pytest.fixture
+async def staff() -> list[User]:
+    await User.filter(is_staff=True).update(is_staff=False)
+    users = [await user_mock() for _ in range(5)] + [await inactive_user_mock()]
+    await User.filter(id__in=[user.id for user in users]).update(is_staff=True)
+    return users
+
+
+async def create_broadcast(**kwargs) -> Broadcast:
+    broadcast_in = BroadcastCreate(template_name='welcome_email.html', subject='News', is_staff=True)
+    return await Broadcast.create(**{
+        'template_name': broadcast_in.template_name,
+        'subject': broadcast_in.subject,
+        'filters': broadcast_in.filters(),
+        'created_by': 0,
+        **kwargs,
+    })
+
+
+async def test_broadcast_sends_in_chunks(staff: list[User], smtp_sink: SMTPSink) -> None:
+    runner = Broadcaster(chunk_size=2, concurrency=1, lease=60, poll_interval=1)
+    broadcast = await create_broadcast()
+    token = await runner._acquire(broadcast.id)
+    assert token
+
+    assert await runner.run_chunk(broadcast, token) is True
+    assert len(smtp_sink.messages) == 2
+    assert (await Broadcast.get(id=broadcast.id)).last_user_id == staff[1].id
+
+    await runner.run(broadcast.id, token)
+    active = [user.email for user in staff if user.is_active]
+    assert sorted(message['To'] for message in smtp_sink.messages) == sorted(active)
+    assert all(message['Subject'] == 'News' for message in smtp_sink.messages)
+
+    broadcast = await Broadcast.get(id=broadcast.id)
+    assert broadcast.state == BroadcastState.DONE
+    assert broadcast.sent == len(active)
+    assert broadcast.failed == 0
+    assert broadcast.lease_until is None
+    assert broadcast.lease_token is None
+    assert broadcast.finished_at
+
+
+async def test_broadcast_resumes_after_last_user(staff: list[User], smtp_sink: SMTPSink) -> None:
+    resumer = Broadcaster(chunk_size=2, concurrency=2, lease=60, poll_interval=1)
+    broadcast = await create_broadcast(last_user_id=staff[2].id, sent=3)
+
+    assert await resumer.resume() == 1
+    broadcast = await resumer._tasks[broadcast.id]
+    assert await resumer.resume() == 0
+
+    assert sorted(message['To'] for message in smtp_sink.messages) == sorted(user.email for user in staff[3:5])
+    assert broadcast.sent == 5
+    assert broadcast.state == BroadcastState.DONE
+
+
+async def test_broadcast_failures_go_to_outbox(staff: list[User], unreachable_smtp) -> None:
+    runner = Broadcaster(chunk_size=10, concurrency=2, lease=60, poll_interval=1)
+    broadcast = await create_broadcast()
+    token = await runner._acquire(broadcast.id)
+    assert token
+
+    assert await runner.run_chunk(broadcast, token) is True
+    broadcast = await Broadcast.get(id=broadcast.id)
+    assert broadcast.sent == 0
+    assert broadcast.failed == 5
+    assert await Outbox.filter(email_to__in=[user.email for user in staff]).count() == 5
+    await Outbox.filter(email_to__in=[user.email for user in staff]).delete()
+
+
+async def test_broadcast_stops_when_lease_taken_over(staff: list[User], smtp_sink: SMTPSink) -> None:
+    runner = Broadcaster(chunk_size=2, concurrency=1, lease=60, poll_interval=1)
+    broadcast = await create_broadcast()
+    token = await runner._acquire(broadcast.id)
+    assert token
+
+    # The lease expires mid chunk and another worker takes the job over
+    await Broadcast.filter(id=broadcast.id).update(lease_until=None)
+    other = Broadcaster(chunk_size=2, concurrency=1, lease=60, poll_interval=1)
+    assert await other._acquire(broadcast.id)
+
+    assert await runner.run_chunk(broadcast, token) is False
+    broadcast = await Broadcast.get(id=broadcast.id)
+    assert broadcast.last_user_id == 0
+    assert broadcast.sent == 0
+    assert broadcast.state == BroadcastState.RUNNING
+    await Broadcast.filter(id=broadcast.id).delete()
+
+
+async def test_broadcast_failed_run_is_resumed_by_poll(staff: list[User], smtp_sink: SMTPSink, monkeypatch) -> None:
+    runner = Broadcaster(chunk_size=10, concurrency=2, lease=0, poll_interval=0.01)
+    broadcast = await create_broadcast(template_name='missing.html')
+
+    runner.start()
+    try:
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if (await Broadcast.get(id=broadcast.id)).lease_until is not None:
+                break
+        assert smtp_sink.messages == []
+        # Fix the job, the poll picks it up again now that the failed run's lease is free
+        await Broadcast.filter(id=broadcast.id).update(template_name='welcome_email.html')
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if (await Broadcast.get(id=broadcast.id)).state == BroadcastState.DONE:
+                break
+    finally:
+        await runner.stop()
+
+    broadcast = await Broadcast.get(id=broadcast.id)
+    assert broadcast.state == BroadcastState.DONE
+    assert broadcast.sent == 5
+
+
+async def test_broadcast_route(
+    client: AsyncClient,
+    superuser_token_headers: dict[str, str],
+    normaluser_token_headers: dict[str, str],
+    staff: list[User],
+    smtp_sink: SMTPSink,
+) -> None:
+    data = {'template_name': 'welcome_email.html', 'subject': 'News', 'is_staff': True}
+    r = await client.post(f'{settings.API_V1_STR}/broadcasts', headers=normaluser_token_headers, json=data)
+    assert r.status_code == HTTPStatus.FORBIDDEN
+
+    r = await client.post(
+        f'{settings.API_V1_STR}/broadcasts', headers=superuser_token_headers, json={**data, 'template_name': 'nope'}
+    )
+    assert r.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+    r = await client.post(f'{settings.API_V1_STR}/broadcasts', headers=superuser_token_headers, json=data)
+    assert r.status_code == HTTPStatus.ACCEPTED
+    broadcast_id = r.json()['id']
+    assert r.json()['filters'] == {'is_active': True, 'is_staff': True}
+
+    await asyncio.gather(*broadcaster._tasks.values())
+
+    r = await client.get(f'{settings.API_V1_STR}/broadcasts/{broadcast_id}', headers=superuser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()['state'] == BroadcastState.DONE
+    assert r.json()['sent'] == 5
+    assert len(smtp_sink.messages) == 5
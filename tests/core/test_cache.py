@@ -0,0 +1,26 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'size': 2, 'max_size': 2, 'hits': 3, 'misses': 1}
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=10)
+    cache.set('expired', 1, expires_at=time.time() - 1)
+    cache.set('valid', 2, expires_at=time.time() + 60)
+
+    assert cache.get('expired') is None
+    assert cache.get('valid') == 2
+    assert len(cache) == 1
@@ -0,0 +1,56 @@
+import importlib
+from http import HTTPStatus
+
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.db import InstrumentedAsyncpgDBClient
+from app.core.db import pool_stats
+from app.core.db import PoolStats
+from app.main import TORTOISE_ORM
+
+
+def test_pool_settings_reach_asyncpg_client() -> None:
+    config = TORTOISE_ORM['connections']['default']
+    client_class = importlib.import_module(config['engine']).client_class
+    assert client_class is InstrumentedAsyncpgDBClient
+
+    client = client_class(connection_name='default', **config['credentials'])
+    assert client.pool_minsize == settings.POSTGRES_POOL_MIN_SIZE
+    assert client.pool_maxsize == settings.POSTGRES_POOL_MAX_SIZE
+    assert client.extra == {
+        'max_inactive_connection_lifetime': settings.POSTGRES_POOL_MAX_INACTIVE_SECONDS,
+        'statement_cache_size': settings.POSTGRES_STATEMENT_CACHE_SIZE,
+        'command_timeout': settings.POSTGRES_COMMAND_TIMEOUT_SECONDS,
+    }
+
+
+def test_pool_stats_summary() -> None:
+    stats = PoolStats(window=3)
+    assert stats.summary()['wait_p95_ms'] == 0.0
+
+    for wait in (0.001, 0.002, 0.003, 0.010):
+        stats.record(wait)
+    summary = stats.summary()
+    assert summary['acquires'] == 4
+    assert summary['wait_mean_ms'] == 4.0
+    assert summary['wait_max_ms'] == 10.0
+    assert summary['wait_p50_ms'] == 3.0
+    assert summary['wait_p99_ms'] == 10.0
+
+
+async def test_pool_stats_without_pool() -> None:
+    stats = pool_stats()
+    assert stats['pid']
+    assert all(connection['pool'] is None for connection in stats['connections'].values())
+
+
+async def test_db_pool_route(
+    client: AsyncClient, superuser_token_headers: dict[str, str], normaluser_token_headers: dict[str, str]
+) -> None:
+    r = await client.get(f'{settings.API_V1_STR}/db-pool', headers=superuser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+    assert 'connections' in r.json()
+
+    r = await client.get(f'{settings.API_V1_STR}/db-pool', headers=normaluser_token_headers)
+    assert r.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,108 @@
+from datetime import datetime
+from datetime import timedelta
+
+import pytest
+from tortoise import connections
+from tortoise.router import router
+from tortoise.transactions import in_transaction
+from tortoise.utils import get_schema_sql
+
+from app.core import db_router
+from app.core.config import parse_servers
+from app.core.db_router import ReplicaRouter
+from app.core.db_router import ReplicaSet
+from app.core.db_router import set_request_user
+from app.core.db_router import use_primary
+from app.core.revocation import RevocationStore
+from app.models.token import RevokedToken
+from app.models.user import User
+from tests.utils.utils import user_mock
+
+ALIASES = ['replica_0', 'replica_1']
+
+
+@pytest.fixture
+async def replicas(tmp_path, monkeypatch):
+    schema = get_schema_sql(connections.get('default'), safe=True)
+    for alias in ALIASES:
+        connections.db_config[alias] = f'sqlite://{tmp_path / alias}.db'
+        await connections.get(alias).execute_script(schema)
+    replica_set = ReplicaSet(aliases=ALIASES, selection='round_robin', read_your_writes=60, check_interval=1)
+    monkeypatch.setattr(db_router, 'replicas', replica_set)
+    router.init_routers([ReplicaRouter])
+    yield replica_set
+    router.init_routers([])
+    for alias in ALIASES:
+        await connections.get(alias).close()
+        connections.discard(alias)
+        del connections.db_config[alias]
+
+
+async def test_reads_round_robin_across_replicas(replicas: ReplicaSet) -> None:
+    user = await user_mock()
+
+    # The row only exists on the primary
+    assert await User.get_or_none(id=user.id) is None
+    assert await User.get_or_none(id=user.id) is None
+    assert replicas.reads == {'replica_0': 1, 'replica_1': 1}
+
+    with use_primary():
+        assert await User.get_or_none(id=user.id)
+
+
+async def test_reads_in_transaction_use_primary(replicas: ReplicaSet) -> None:
+    user = await user_mock()
+    async with in_transaction('default'):
+        assert await User.get_or_none(id=user.id)
+    assert replicas.reads == {'replica_0': 0, 'replica_1': 0}
+
+
+async def test_read_your_writes(replicas: ReplicaSet) -> None:
+    other = await user_mock()
+    user = await user_mock()
+    set_request_user(user.id)
+    assert await User.get_or_none(id=user.id) is None
+
+    await User.filter(id=user.id).update(first_name='changed')
+    assert (await User.get(id=user.id)).first_name == 'changed'
+
+    set_request_user(other.id)
+    assert await User.get_or_none(id=other.id) is None
+
+
+async def test_unhealthy_replicas_fall_back(replicas: ReplicaSet, tmp_path) -> None:
+    user = await user_mock()
+    await connections.get('replica_1').close()
+    connections.discard('replica_1')
+    connections.db_config['replica_1'] = f'sqlite://{tmp_path}/missing/replica_1.db'
+
+    await replicas.check()
+    assert replicas.healthy == {'replica_0'}
+    assert await User.get_or_none(id=user.id) is None
+    assert await User.get_or_none(id=user.id) is None
+    assert replicas.reads == {'replica_0': 2, 'replica_1': 0}
+
+    replicas.healthy.clear()
+    assert await User.get_or_none(id=user.id)
+    assert replicas.stats()['primary_reads'] == 1
+
+
+async def test_least_loaded_prefers_idle_replica(replicas: ReplicaSet, monkeypatch) -> None:
+    replicas.selection = 'least_loaded'
+    monkeypatch.setattr(replicas, '_load', lambda alias: {'replica_0': 3, 'replica_1': 1}[alias])
+    assert replicas.choose() == 'replica_1'
+    assert replicas.choose() == 'replica_1'
+
+
+async def test_revocations_read_from_primary(replicas: ReplicaSet) -> None:
+    store = RevocationStore(capacity=1000, error_rate=0.001, cache_size=10, sync_interval=0)
+    await RevokedToken.create(key='family:replica-lag', expires=datetime.now() + timedelta(days=1))
+
+    # The revocation only exists on the primary
+    assert await store.is_revoked('family:replica-lag')
+    assert replicas.reads == {'replica_0': 0, 'replica_1': 0}
+
+
+def test_parse_replica_servers() -> None:
+    assert parse_servers('db-1, db-2:5433,') == ['db-1', 'db-2:5433']
+    assert parse_servers(['db-1']) == ['db-1']
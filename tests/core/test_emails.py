@@ -0,0 +1,56 @@
+from app.core import emails
+from app.core.config import settings
+from app.core.smtp_pool import SMTPConnectionPool
+from tests.utils.smtp import SMTPSink
+
+
+async def test_send_email(smtp_sink: SMTPSink) -> None:
+    await emails.send_email(email_to='user@test.com', subject='Hello', html_content='<p>Hi</p>')
+
+    assert len(smtp_sink.messages) == 1
+    message = smtp_sink.messages[0]
+    assert message['To'] == 'user@test.com'
+    assert message['Subject'] == 'Hello'
+    assert settings.EMAILS_FROM_EMAIL in message['From']
+    assert '<p>Hi</p>' in message.get_payload(decode=True).decode()
+
+
+async def test_send_email_unreachable(unreachable_smtp) -> None:
+
+    await emails.send_email(email_to='user@test.com', subject='Hello', html_content='<p>Hi</p>')
+
+
+def test_email_templates_render(tmp_path) -> None:
+    templates = emails.EmailTemplates(tmp_path, bytecode_cache_dir=str(tmp_path / 'cache'))
+    (tmp_path / 'hello.html').write_text('Hello {{ name }}')
+    templates.load()
+
+    assert templates.render('hello.html', {'name': 'World'}) == 'Hello World'
+    assert list((tmp_path / 'cache').iterdir())
+
+
+def test_generate_reset_password_email() -> None:
+    email_data = emails.generate_reset_password_email(email_to='user@test.com', first_name='User')
+    assert email_data.subject == 'Password Reset'
+    assert f'{settings.FRONTEND_HOST}/reset-password/' in email_data.html_content
+
+
+async def test_send_email_batch_reuses_connections(smtp_sink: SMTPSink, monkeypatch) -> None:
+    pool = SMTPConnectionPool(max_size=2, idle_timeout=60, max_messages=100, health_check_after=60)
+    monkeypatch.setattr(emails, 'smtp_pool', pool)
+    batch = [(f'user{i}@test.com', emails.EmailData(html_content='<p>Hi</p>', subject='Hello')) for i in range(10)]
+
+    assert await emails.send_email_batch(batch) == [True] * 10
+    assert len(smtp_sink.messages) == 10
+    assert smtp_sink.connections == pool.connects == 2
+    await pool.close()
+
+
+async def test_smtp_pool_recycles_connections(smtp_sink: SMTPSink) -> None:
+    pool = SMTPConnectionPool(max_size=1, idle_timeout=60, max_messages=2, health_check_after=0)
+    for _ in range(4):
+        await pool.send(emails.build_message(email_to='user@test.com', subject='Hello'))
+
+    assert len(smtp_sink.messages) == 4
+    assert pool.connects == 2
+    await pool.close()
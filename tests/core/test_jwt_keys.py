@@ -0,0 +1,53 @@
+import pytest
+
+from app.core import jwt_keys
+from app.core import security
+from app.core.config import settings
+
+serialization = pytest.importorskip('cryptography.hazmat.primitives.serialization')
+
+
+def write_key(path, key) -> None:
+    path.write_bytes(
+        key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+    )
+
+
+@pytest.fixture
+def asymmetric_keys(monkeypatch, tmp_path):
+    from cryptography.hazmat.primitives.asymmetric import ed25519
+
+    write_key(tmp_path / 'old.pem', ed25519.Ed25519PrivateKey.generate())
+    write_key(tmp_path / 'new.pem', ed25519.Ed25519PrivateKey.generate())
+    monkeypatch.setattr(settings, 'JWT_ALGORITHM', 'EdDSA')
+    monkeypatch.setattr(settings, 'JWT_KEYS_DIR', str(tmp_path))
+    monkeypatch.setattr(settings, 'JWT_SIGNING_KID', 'old')
+    monkeypatch.setattr(jwt_keys, '_jwt_keys', jwt_keys.load_jwt_keys())
+    return tmp_path
+
+
+def test_asymmetric_sign_and_verify(asymmetric_keys) -> None:
+    old_token = security.create_access_token(1)
+    assert security.verify_token(old_token, 'access') == 1
+
+    # Tokens signed by a previous key stay valid after rotating the signing kid
+    settings.JWT_SIGNING_KID = 'new'
+    jwt_keys.init_jwt_keys()
+    assert security.verify_token(old_token, 'access') == 1
+    assert security.verify_token(security.create_access_token(2), 'access') == 2
+
+    jwks = jwt_keys.get_jwt_keys().jwks
+    assert sorted(key['kid'] for key in jwks['keys']) == ['new', 'old']
+    assert all(key['kty'] == 'OKP' and 'd' not in key for key in jwks['keys'])
+
+
+def test_asymmetric_unknown_kid(asymmetric_keys) -> None:
+    token = security.create_access_token(1)
+    (asymmetric_keys / 'old.pem').unlink()
+    settings.JWT_SIGNING_KID = 'new'
+    jwt_keys.init_jwt_keys()
+    assert security.verify_token(token, 'access') is None
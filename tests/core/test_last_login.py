@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime
+from datetime import timedelta
+
+from app.core.config import settings
+from app.core.last_login import LastLoginBuffer
+from app.models.user import User
+from tests.utils.utils import user_mock
+
+
+async def test_last_login_buffer_coalesces_and_flushes() -> None:
+    buffer = LastLoginBuffer(max_size=100, interval=60)
+    user = await user_mock()
+    first = datetime(2025, 1, 1, 12, 0)
+
+    await buffer.record(user.id, first)
+    await buffer.record(user.id, first + timedelta(minutes=1))
+    assert len(buffer) == 1
+    assert (await User.get(id=user.id)).last_login is None
+
+    await buffer.flush()
+    assert len(buffer) == 0
+    assert buffer.flushed == 1
+    assert (await User.get(id=user.id)).last_login.replace(tzinfo=None) == first + timedelta(minutes=1)
+
+
+async def test_last_login_buffer_flushes_at_max_size() -> None:
+    buffer = LastLoginBuffer(max_size=2, interval=60)
+    users = [await user_mock(), await user_mock()]
+    for user in users:
+        await buffer.record(user.id, datetime.now())
+
+    assert len(buffer) == 0
+    for user in users:
+        assert (await User.get(id=user.id)).last_login
+
+
+async def test_last_login_immediate(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'LAST_LOGIN_BUFFERED', False)
+    buffer = LastLoginBuffer(max_size=100, interval=60)
+    user = await user_mock()
+
+    await buffer.record(user.id, datetime.now())
+    assert len(buffer) == 0
+    assert (await User.get(id=user.id)).last_login
+
+
+async def test_last_login_stop_keeps_batch_cancelled_mid_write(monkeypatch) -> None:
+    buffer = LastLoginBuffer(max_size=100, interval=0)
+    user = await user_mock()
+    last_login = datetime(2025, 1, 1, 12, 0)
+    await buffer.record(user.id, last_login)
+
+    write = buffer._write
+    writing = asyncio.Event()
+
+    async def blocked_write(pending):
+        writing.set()
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(buffer, '_write', blocked_write)
+    buffer.start()
+    await writing.wait()
+    monkeypatch.setattr(buffer, '_write', write)
+
+    await buffer.stop()
+    assert len(buffer) == 0
+    assert (await User.get(id=user.id)).last_login.replace(tzinfo=None) == last_login
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+from aerich.models import Aerich
+
+from app.core.migrations import check_migrations
+from app.core.migrations import migration_files
+from app.core.migrations import MigrationsPending
+
+
+def write_migrations(directory: Path, *names: str) -> None:
+    for name in names:
+        (directory / name).write_text('')
+
+
+async def test_migration_files_in_order(tmp_path: Path) -> None:
+    write_migrations(tmp_path, '10_b.py', '2_a.py', '__init__.py', 'notes.txt')
+    assert migration_files(tmp_path) == ['2_a.py', '10_b.py']
+    assert migration_files()[0].startswith('1_')
+
+
+async def test_check_migrations(tmp_path: Path) -> None:
+    app = 'test_check_migrations'
+    write_migrations(tmp_path, '1_init.py', '2_index.py')
+    await Aerich.create(version='1_init.py', app=app, content={})
+    with pytest.raises(MigrationsPending, match=r'2_index\.py'):
+        await check_migrations(app, tmp_path)
+
+    await Aerich.create(version='2_index.py', app=app, content={})
+    await check_migrations(app, tmp_path)
+
+    # Migrations this build doesn't know about only warn
+    await Aerich.create(version='3_newer.py', app=app, content={})
+    await check_migrations(app, tmp_path)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.emails import EmailData
+from app.core.outbox import _now
+from app.core.outbox import enqueue_email
+from app.core.outbox import outbox_counts
+from app.core.outbox import OutboxWorker
+from app.models.outbox import Outbox
+from app.models.outbox import OutboxState
+from tests.utils.smtp import SMTPSink
+
+
+@pytest.fixture
+async def worker():
+    await Outbox.all().delete()
+    return OutboxWorker(
+        batch_size=10, poll_interval=1, lease=60, max_attempts=2, backoff=30, max_backoff=3600, retention=3600
+    )
+
+
+async def test_outbox_delivers_pending(worker: OutboxWorker, smtp_sink: SMTPSink) -> None:
+    for i in range(3):
+        await enqueue_email(f'user{i}@test.com', EmailData(subject='Hello', html_content='<p>Hi</p>'))
+
+    assert await worker.run_once() == 3
+    assert await worker.run_once() == 0
+
+    assert sorted(message['To'] for message in smtp_sink.messages) == [f'user{i}@test.com' for i in range(3)]
+    assert await outbox_counts() == {'pending': 0, 'sent': 3, 'dead': 0}
+    assert await Outbox.filter(html_content__isnull=False).count() == 0
+
+
+async def test_outbox_claim_leases_rows(worker: OutboxWorker) -> None:
+    row = await enqueue_email('user@test.com', EmailData(subject='Hello', html_content='<p>Hi</p>'))
+
+    claimed = await worker.claim()
+    assert [claimed_row.id for claimed_row in claimed] == [row.id]
+    assert await worker.claim() == []
+
+    row = await Outbox.get(id=row.id)
+    assert row.attempts == 1
+    assert row.available_at.replace(tzinfo=None) > _now() + timedelta(seconds=30)
+
+
+async def test_outbox_backoff_then_dead(worker: OutboxWorker, unreachable_smtp) -> None:
+    row = await enqueue_email('user@test.com', EmailData(subject='Hello', html_content='<p>Hi</p>'))
+
+    assert await worker.run_once() == 1
+    row = await Outbox.get(id=row.id)
+    assert row.state == OutboxState.PENDING
+    assert row.attempts == 1
+    assert row.last_error
+    assert row.available_at.replace(tzinfo=None) > _now() + timedelta(seconds=20)
+
+    await Outbox.filter(id=row.id).update(available_at=_now())
+    assert await worker.run_once() == 1
+    row = await Outbox.get(id=row.id)
+    assert row.state == OutboxState.DEAD
+    assert row.attempts == 2
+    assert await outbox_counts() == {'pending': 0, 'sent': 0, 'dead': 1}
+
+
+async def test_outbox_purge(worker: OutboxWorker) -> None:
+    data = EmailData(subject='Hello', html_content='<p>Hi</p>')
+    old = _now() - timedelta(seconds=worker.retention + 60)
+    pending = await enqueue_email('pending@test.com', data)
+    await Outbox.filter(id=pending.id).update(available_at=old)
+    for state in (OutboxState.SENT, OutboxState.DEAD):
+        row = await enqueue_email(f'{state.value}@test.com', data)
+        await Outbox.filter(id=row.id).update(state=state, available_at=old)
+    recent = await enqueue_email('recent@test.com', data)
+    await Outbox.filter(id=recent.id).update(state=OutboxState.SENT)
+
+    assert await worker.purge() == 2
+    assert sorted(await Outbox.all().values_list('email_to', flat=True)) == ['pending@test.com', 'recent@test.com']
+
+
+async def test_outbox_status_route(
+    client: AsyncClient, superuser_token_headers: dict[str, str], normaluser_token_headers: dict[str, str]
+) -> None:
+    r = await client.get(f'{settings.API_V1_STR}/outbox', headers=superuser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+    assert set(r.json()) == {'pending', 'sent', 'dead'}
+
+    r = await client.get(f'{settings.API_V1_STR}/outbox', headers=normaluser_token_headers)
+    assert r.status_code == HTTPStatus.FORBIDDEN
@@ -0,0 +1,39 @@
+import pytest
+
+from app.core.rate_limit import InMemoryRateLimitBackend
+from app.core.rate_limit import Rate
+
+
+def test_rate_parse() -> None:
+    assert Rate.parse('5/minute') == Rate(5, 60)
+
+
+@pytest.mark.parametrize('value', ['0/minute', '-1/hour'])
+def test_rate_parse_rejects_empty_limit(value: str) -> None:
+    with pytest.raises(ValueError, match='at least one request'):
+        Rate.parse(value)
+
+
+def test_sliding_window() -> None:
+    backend = InMemoryRateLimitBackend('sliding_window')
+    rate = Rate(2, 60)
+    assert backend.hit('key', rate) == 0
+    assert backend.hit('key', rate) == 0
+    assert 0 < backend.hit('key', rate) <= 120
+    assert backend.hit('other', rate) == 0
+    assert len(backend) == 2
+
+
+def test_token_bucket() -> None:
+    backend = InMemoryRateLimitBackend('token_bucket')
+    rate = Rate(2, 60)
+    assert backend.hit('key', rate) == 0
+    assert backend.hit('key', rate) == 0
+    assert 0 < backend.hit('key', rate) <= 30
+
+
+def test_sweep_evicts_idle_keys() -> None:
+    backend = InMemoryRateLimitBackend('token_bucket')
+    backend.hit('key', Rate(1, 1))
+    backend.sweep(now=backend._state['key'][0] + 1)
+    assert len(backend) == 0
@@ -0,0 +1,58 @@
+from datetime import datetime
+from datetime import timedelta
+
+from app.core.revocation import BloomFilter
+from app.core.revocation import RevocationStore
+from app.models.token import RevokedToken
+
+
+def test_bloom_filter() -> None:
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f'key:{i}')
+    assert all(f'key:{i}' in bloom for i in range(1000))
+    false_positives = sum(f'other:{i}' in bloom for i in range(10_000))
+    assert false_positives < 300
+
+
+async def test_revocation_store_skips_database_for_unrevoked_keys() -> None:
+    store = RevocationStore(capacity=1000, error_rate=0.001, cache_size=10, sync_interval=60)
+    expires = datetime.now() + timedelta(days=1)
+
+    assert await store.revoke('family:revoked', expires)
+    assert not await store.revoke('family:revoked', expires)
+    assert await store.is_revoked('family:revoked')
+    assert not await store.is_revoked('family:unknown')
+    assert store.database_checks == 0
+
+
+async def test_revocation_store_keeps_used_jtis_out_of_the_filter() -> None:
+    store = RevocationStore(capacity=1000, error_rate=0.001, cache_size=10, sync_interval=0)
+    expires = datetime.now() + timedelta(days=1)
+
+    assert await store.revoke('jti:used', expires)
+    assert not await store.revoke('jti:used', expires)
+    await store.sync()
+    assert 'jti:used' not in store.bloom
+    assert await store.is_revoked('jti:used')
+
+
+async def test_revocation_store_rebuild_grows_the_filter() -> None:
+    store = RevocationStore(capacity=2, error_rate=0.001, cache_size=10, sync_interval=60)
+    expires = datetime.now() + timedelta(days=1)
+    for i in range(3):
+        await store.revoke(f'family:rebuild-{i}', expires)
+
+    await store.sync()
+    live = await RevokedToken.filter(key__startswith='family:', expires__gt=datetime.now()).count()
+    assert store.bloom.capacity >= 2 * live
+    assert store.bloom.count == live
+    assert all([await store.is_revoked(f'family:rebuild-{i}') for i in range(3)])
+
+
+async def test_revocation_store_syncs_other_workers() -> None:
+    store = RevocationStore(capacity=1000, error_rate=0.001, cache_size=10, sync_interval=0)
+    await RevokedToken.create(key='family:other-worker', expires=datetime.now() + timedelta(days=1))
+
+    assert await store.is_revoked('family:other-worker')
+    assert store.database_checks == 1
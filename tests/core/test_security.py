@@ -0,0 +1,41 @@
+from app.core import security
+from app.core.config import settings
+
+
+async def test_password_executor_round_trip(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'PASSWORD_HASH_WORKERS', 1)
+    security.start_password_executor()
+    try:
+        hashed = await security.hash_password('mockpassword')
+        assert await security.verify_password('mockpassword', hashed)
+        assert await security.verify_password('incorrect', hashed) is False
+    finally:
+        security.shutdown_password_executor()
+
+
+def test_verify_token_cache(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'TOKEN_CACHE_ENABLED', True)
+    security.token_cache.clear()
+    token = security.create_access_token(1)
+
+    assert security.verify_token(token, 'access') == 1
+    assert security.verify_token(token, 'access') == 1
+    assert security.verify_token(token, 'refresh') is None
+    assert security.token_cache.hits == 2
+    assert security.token_cache.misses == 1
+
+
+def test_verify_token_cache_invalid(monkeypatch) -> None:
+    monkeypatch.setattr(settings, 'TOKEN_CACHE_ENABLED', True)
+    security.token_cache.clear()
+
+    assert security.verify_token('invalid', 'access') is None
+    assert security.verify_token('invalid', 'access') is None
+    assert security.token_cache.hits == 1
+    assert len(security.token_cache) == 1
+
+
+def test_calibrate_password_rounds() -> None:
+    rounds, elapsed = security.calibrate_password_rounds('django_pbkdf2_sha256', 0.01, samples=1)
+    assert rounds >= 1
+    assert elapsed > 0
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+from app.core.user_cache import user_cache as cache
+from app.models.user import User
+from app.schemas.user_schema import UserUpdate
+from tests.utils.utils import user_mock
+
+
+async def test_user_cache_hit_and_invalidate_on_save() -> None:
+    cache.clear()
+    user = await user_mock()
+
+    assert (await cache.get(user.id)).email == user.email
+    cached = await cache.get(user.id)
+    assert cached.email == user.email
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    cached.first_name = 'Changed'
+    await cached.save()
+    assert len(cache) == 0
+
+
+async def test_user_cache_invalidate_on_delete() -> None:
+    cache.clear()
+    user = await user_mock()
+    await cache.get(user.id)
+
+    await user.delete()
+    assert await cache.get(user.id) is None
+
+
+async def test_user_cache_invalidate_on_update() -> None:
+    cache.clear()
+    user = await user_mock()
+    await cache.get(user.id)
+
+    await User.update(user.id, UserUpdate(first_name='Updated'))
+    assert (await cache.get(user.id)).first_name == 'Updated'
+
+
+async def test_user_cache_stale_while_revalidate() -> None:
+    cache.clear()
+    user = await user_mock()
+    await cache.get(user.id)
+    cache._data[user.id].fetched_at = time.monotonic() - cache.ttl - 1
+
+    assert (await cache.get(user.id)).id == user.id
+    assert cache.stale_hits == 1
+    await asyncio.gather(*cache._refreshing.values())
+    assert time.monotonic() - cache._data[user.id].fetched_at < cache.ttl
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+
+from app.core.user_export import EXPORT_COLUMNS
+from app.core.user_export import export_users
+from app.core.user_export import user_batches
+from app.models.user import User
+from tests.utils.utils import user_mock
+
+
+async def test_user_batches_fetch_size() -> None:
+    await user_mock()
+    await user_mock()
+    total = await User.all().count()
+
+    batches = [rows async for rows in user_batches(fetch_size=1)]
+    assert len(batches) == total
+    assert [rows[0][0] for rows in batches] == sorted(await User.all().values_list('id', flat=True))
+
+
+async def test_export_users_ndjson() -> None:
+    user = await user_mock()
+    body = b''.join([chunk async for chunk in export_users('ndjson', fetch_size=2)])
+
+    rows = {row['id']: row for row in map(json.loads, body.decode().splitlines())}
+    assert tuple(rows[user.id]) == EXPORT_COLUMNS
+    assert rows[user.id]['email'] == user.email
+    assert rows[user.id]['last_login'] is None
+    assert rows[user.id]['created'].startswith(str(user.created.year))
+
+
+async def test_export_users_csv() -> None:
+    user = await user_mock()
+    body = b''.join([chunk async for chunk in export_users('csv', fetch_size=2)])
+
+    rows = list(csv.DictReader(io.StringIO(body.decode())))
+    assert len(rows) == await User.all().count()
+    exported = next(row for row in rows if row['id'] == str(user.id))
+    assert exported['email'] == user.email
+    assert 'password' not in exported
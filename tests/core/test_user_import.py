@@ -0,0 +1,131 @@
+import json
+from collections.abc import AsyncIterator
+
+from app.core.security import pwd_context
+from app.core.security import verify_password
+from app.core.user_import import read_rows
+from app.core.user_import import UserImporter
+from app.models.user import User
+from tests.utils.utils import random_email
+from tests.utils.utils import random_lower_string
+from tests.utils.utils import user_mock
+
+
+async def stream(body: bytes, size: int = 7) -> AsyncIterator[bytes]:
+    # Small chunks split lines across reads
+    for i in range(0, len(body), size):
+        yield body[i : i + size]
+
+
+def ndjson(*rows: object) -> bytes:
+    return b'\n'.join(json.dumps(row).encode() for row in rows) + b'\n'
+
+
+def new_row(**fields: str) -> dict[str, str]:
+    return {
+        'email': random_email(),
+        'first_name': random_lower_string(),
+        'last_name': random_lower_string(),
+        'password': 'mockpassword',
+        **fields,
+    }
+
+
+async def test_read_rows_ndjson() -> None:
+    body = b'{"email": "a@test.com"}\n\nnot json\n[1]\n{"email": "b@test.com"}'
+    rows = [row async for row in read_rows(stream(body), 'ndjson')]
+    assert rows == [
+        (1, {'email': 'a@test.com'}, None),
+        (3, None, 'Invalid JSON'),
+        (4, None, 'Expected a JSON object'),
+        (5, {'email': 'b@test.com'}, None),
+    ]
+
+
+async def test_read_rows_csv() -> None:
+    body = b'email,first_name,password\r\na@test.com,"Doe, Jane",\r\nb@test.com\r\n'
+    rows = [row async for row in read_rows(stream(body), 'csv')]
+    assert rows == [
+        (2, {'email': 'a@test.com', 'first_name': 'Doe, Jane'}, None),
+        (3, None, 'Expected 3 columns, got 1'),
+    ]
+
+
+async def test_read_rows_fails_long_lines() -> None:
+    body = b'{"email": "a@test.com"}\n' + b'x' * 100 + b'\n{"email": "b@test.com"}\n' + b'y' * 100
+    rows = [row async for row in read_rows(stream(body), 'ndjson', max_line_bytes=30)]
+    assert rows == [
+        (1, {'email': 'a@test.com'}, None),
+        (2, None, 'Line longer than 30 bytes'),
+        (3, {'email': 'b@test.com'}, None),
+        (4, None, 'Line longer than 30 bytes'),
+    ]
+
+
+async def test_import_reports_failed_rows() -> None:
+    existing = await user_mock()
+    hashed = new_row(password_hash=pwd_context.hash('hashedpassword'))
+    del hashed['password']
+    plain = new_row(email=random_email().upper())
+    malformed = new_row()
+    del malformed['password']
+    body = ndjson(
+        plain,
+        hashed,
+        new_row(email='not an email'),
+        new_row(password_hash='plain text'),
+        new_row(email=plain['email']),
+        new_row(email=existing.email),
+        {**malformed, 'password_hash': '$pbkdf2-sha256$garbage'},
+    )
+
+    result = await UserImporter(chunk_size=2).run(read_rows(stream(body), 'ndjson'))
+    assert (result.received, result.created, result.updated, result.failed) == (7, 2, 0, 5)
+    assert [(error.line, error.errors[0].split(':')[0]) for error in result.errors] == [
+        (3, 'email'),
+        (4, 'Value error, set either password or password_hash'),
+        (5, 'email'),
+        (6, 'email'),
+        (7, 'password_hash'),
+    ]
+
+    user = await User.get_by_email(plain['email'])
+    assert user.email == plain['email'].lower()
+    assert user.is_active is False
+    assert await verify_password('mockpassword', user.password)
+    assert await verify_password('hashedpassword', (await User.get_by_email(hashed['email'])).password)
+    assert (await User.get(id=existing.id)).first_name == existing.first_name
+    assert await User.get_by_email(malformed['email']) is None
+
+
+async def test_import_updates_existing() -> None:
+    existing = await user_mock()
+    row = new_row(email=existing.email, password='newpassword')
+
+    result = await UserImporter(on_conflict='update').run(read_rows(stream(ndjson(row)), 'ndjson'))
+    assert (result.created, result.updated, result.failed) == (0, 1, 0)
+
+    user = await User.get(id=existing.id)
+    assert user.first_name == row['first_name']
+    assert await verify_password('newpassword', user.password)
+
+
+async def test_import_never_updates_superusers() -> None:
+    superuser = await user_mock()
+    await User.filter(id=superuser.id).update(is_superuser=True)
+    row = new_row(email=superuser.email, password='newpassword')
+
+    result = await UserImporter(on_conflict='update').run(read_rows(stream(ndjson(row)), 'ndjson'))
+    assert (result.created, result.updated, result.failed) == (0, 0, 1)
+    assert result.errors[0].errors == ['email: Superusers can not be updated by an import']
+
+    user = await User.get(id=superuser.id)
+    assert user.first_name == superuser.first_name
+    assert await verify_password('mockpassword', user.password)
+
+
+async def test_import_limits_listed_errors() -> None:
+    body = ndjson(*[{'email': 'invalid'}] * 3)
+    result = await UserImporter(max_errors=1).run(read_rows(stream(body), 'ndjson'))
+    assert result.failed == 3
+    assert len(result.errors) == 1
@@ -0,0 +1,38 @@
+from app.core import user_lookup
+from app.core.user_lookup import get_user_by_email
+from app.core.user_lookup import get_user_by_id
+from app.models.user import User
+from tests.utils.queries import capture_queries
+from tests.utils.utils import user_mock
+
+
+async def test_get_user_by_id() -> None:
+    user = await user_mock()
+    with capture_queries() as log:
+        found = await get_user_by_id(user.id)
+    assert isinstance(found, User)
+    assert (found.id, found.email, found.password, found.is_active) == (user.id, user.email, user.password, True)
+    assert found.created == (await User.get(id=user.id)).created
+    assert log.queries == [(user_lookup.STATEMENTS['sqlite']['id'], [user.id])]
+
+    assert await get_user_by_id(-1) is None
+
+
+async def test_get_user_by_email() -> None:
+    user = await user_mock()
+    found = await get_user_by_email(user.email.upper())
+    assert found is not None
+    assert found.id == user.id
+
+    assert await get_user_by_email('missing@test.com') is None
+
+
+async def test_orm_fallback(monkeypatch) -> None:
+    statements = user_lookup.STATEMENTS['sqlite'].values()
+    monkeypatch.setattr(user_lookup, 'STATEMENTS', {})
+    user = await user_mock()
+    with capture_queries() as log:
+        assert (await get_user_by_id(user.id)).id == user.id
+        assert (await get_user_by_email(user.email)).id == user.id
+    assert len(log.queries) == 2
+    assert not any(query in statements for query, _ in log.queries)
@@ -0,0 +1,136 @@
+"""
+EXPLAIN every statement a route sends for the user table against a seeded Postgres database, see conftest.py
+"""
+
+import json
+from collections.abc import Iterator
+from http import HTTPStatus
+from typing import Any
+
+import pytest
+from httpx import AsyncClient
+from tortoise import connections
+
+from app.core.config import settings
+from app.models.user import User
+from tests.plans.conftest import SEED_USERS
+from tests.utils.queries import capture_queries
+from tests.utils.queries import QueryLog
+
+# asyncpg connections belong to the loop that opened them in the session fixtures
+pytestmark = pytest.mark.asyncio(scope='session')
+
+# Below this many rows a sequential scan is a reasonable plan
+SEQ_SCAN_ROWS = 1000
+
+
+async def explain(query: str, values: list[Any]) -> dict[str, Any]:
+    rows = await connections.get('default').execute_query_dict(f'EXPLAIN (FORMAT JSON) {query}', values)
+    plan = rows[0]['QUERY PLAN']
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def walk(node: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk(child)
+
+
+async def user_plans(log: QueryLog) -> list[dict[str, Any]]:
+    statements = log.statements('user', kinds=('SELECT', 'UPDATE', 'DELETE'))
+    assert statements, 'the route sent no statements for the user table'
+    return [await explain(query, values) for query, values in statements]
+
+
+def assert_no_seq_scan(plans: list[dict[str, Any]], table: str = 'user') -> None:
+    assert SEED_USERS >= SEQ_SCAN_ROWS
+    for plan in plans:
+        scans = [node for node in walk(plan) if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') == table]
+        assert not scans, json.dumps(plan, indent=2)
+
+
+def index_names(plans: list[dict[str, Any]]) -> set[str]:
+    return {node['Index Name'] for plan in plans for node in walk(plan) if 'Index Name' in node}
+
+
+async def test_login_uses_email_index(client: AsyncClient, normal_user: User) -> None:
+    with capture_queries() as log:
+        r = await client.post(
+            f'{settings.API_V1_STR}/login', data={'username': normal_user.email.upper(), 'password': 'mockpassword'}
+        )
+    assert r.status_code == HTTPStatus.OK
+
+    plans = await user_plans(log)
+    assert_no_seq_scan(plans)
+    assert 'idx_user_email_lower' in index_names(plans)
+
+
+async def test_password_recovery_uses_email_index(client: AsyncClient, normal_user: User) -> None:
+    with capture_queries() as log:
+        await client.post(f'{settings.API_V1_STR}/password-recovery', json={'email': normal_user.email})
+
+    plans = await user_plans(log)
+    assert_no_seq_scan(plans)
+    assert 'idx_user_email_lower' in index_names(plans)
+
+
+async def test_current_user_uses_primary_key(client: AsyncClient, normaluser_token_headers: dict[str, str]) -> None:
+    with capture_queries() as log:
+        r = await client.get(f'{settings.API_V1_STR}/users/current', headers=normaluser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+
+    plans = await user_plans(log)
+    assert_no_seq_scan(plans)
+    assert 'user_pkey' in index_names(plans)
+
+
+async def test_get_user_uses_primary_key(
+    client: AsyncClient, superuser_token_headers: dict[str, str], normal_user: User
+) -> None:
+    with capture_queries() as log:
+        r = await client.get(f'{settings.API_V1_STR}/users/{normal_user.id}', headers=superuser_token_headers)
+    assert r.status_code == HTTPStatus.OK
+
+    assert_no_seq_scan(await user_plans(log))
+
+
+async def test_user_list_pages_use_created_index(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    params: dict[str, Any] = {'size': 50}
+    for _ in range(3):
+        with capture_queries() as log:
+            r = await client.get(f'{settings.API_V1_STR}/users', headers=superuser_token_headers, params=params)
+        assert r.status_code == HTTPStatus.OK
+
+        plans = await user_plans(log)
+        assert_no_seq_scan(plans)
+        assert 'idx_user_created_id' in index_names(plans)
+        params['cursor'] = r.json()['next_cursor']
+
+
+async def test_update_user_uses_primary_key(
+    client: AsyncClient, superuser_token_headers: dict[str, str], normal_user: User
+) -> None:
+    with capture_queries() as log:
+        r = await client.put(
+            f'{settings.API_V1_STR}/users/{normal_user.id}', headers=superuser_token_headers, json={'last_name': 'Plan'}
+        )
+    assert r.status_code == HTTPStatus.OK
+
+    plans = await user_plans(log)
+    assert_no_seq_scan(plans)
+    assert 'user_pkey' in index_names(plans)
+
+
+async def test_search_uses_trigram_index(client: AsyncClient, superuser_token_headers: dict[str, str]) -> None:
+    with capture_queries() as log:
+        r = await client.get(
+            f'{settings.API_V1_STR}/users/search', headers=superuser_token_headers, params={'q': 'seed4242'}
+        )
+    assert r.status_code == HTTPStatus.OK
+    assert r.json()[0]['email'] == 'seed4242@plans.test'
+
+    plans = await user_plans(log)
+    assert_no_seq_scan(plans)
+    assert 'idx_user_search_trgm' in index_names(plans)
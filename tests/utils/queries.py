@@ -0,0 +1,41 @@
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+class QueryLog(logging.Handler):
+    """
+    Collects the statements Tortoise sends to the database with their parameters
+    """
+
+    def __init__(self) -> None:
+        super().__init__(logging.DEBUG)
+        self.queries: list[tuple[str, list[Any]]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        # Tortoise logs every statement as ('%s: %s', query, values)
+        if record.msg == '%s: %s' and isinstance(record.args, tuple) and len(record.args) == 2:
+            query, values = record.args
+            self.queries.append((str(query), list(values or [])))
+
+    def statements(self, table: str | None = None, kinds: tuple[str, ...] = ()) -> list[tuple[str, list[Any]]]:
+        return [
+            (query, values)
+            for query, values in self.queries
+            if (table is None or f'"{table}"' in query) and (not kinds or query.lstrip().upper().startswith(kinds))
+        ]
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryLog]:
+    logger = logging.getLogger('tortoise.db_client')
+    handler = QueryLog()
+    level = logger.level
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    try:
+        yield handler
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
@@ -0,0 +1,40 @@
+import asyncio
+from email import message_from_bytes
+from email.message import Message
+from typing import Any
+
+from aiosmtpd.smtp import Envelope
+from aiosmtpd.smtp import SMTP
+
+from app.core.smtp_pool import smtp_pool
+
+
+class SMTPSink:
+    """
+    In-process SMTP server that keeps every received message
+    """
+
+    def __init__(self) -> None:
+        self.messages: list[Message] = []
+        self.connections = 0
+        self._server: asyncio.Server | None = None
+        self.port = 0
+
+    async def handle_DATA(self, server: SMTP, session: Any, envelope: Envelope) -> str:
+        self.messages.append(message_from_bytes(envelope.original_content or b''))
+        return '250 OK'
+
+    def _protocol(self) -> SMTP:
+        self.connections += 1
+        return SMTP(self, hostname='localhost')
+
+    async def __aenter__(self) -> 'SMTPSink':
+        self._server = await asyncio.get_running_loop().create_server(self._protocol, 'localhost', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        assert self._server is not None
+        await smtp_pool.close()
+        self._server.close()
+        await self._server.wait_closed()